@@ -0,0 +1,396 @@
+import datetime
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Width of the score histogram buckets; scores are 0-100, 100 counts into the top bucket
+SCORE_BUCKET_WIDTH = 10
+TOP_SCORE_BUCKET = 90
+
+# Longer "missing" entries are sentences rather than skill names and are not counted
+MAX_SKILL_CHARS = 60
+
+# Characters that cannot appear in an update path; stored as their full-width forms
+_KEY_ESCAPES = {".": "．", "$": "＄"}
+
+
+def role_key(role):
+    """Key under which a role is summarized: trimmed and lower-cased."""
+    return role.strip().lower()
+
+
+def escape_key(name):
+    for char, escaped in _KEY_ESCAPES.items():
+        name = name.replace(char, escaped)
+    return name
+
+
+def unescape_key(name):
+    for char, escaped in _KEY_ESCAPES.items():
+        name = name.replace(escaped, char)
+    return name
+
+
+def split_skills(missing):
+    """
+    Split an evaluation's free-text "missing" field into skill names.
+
+    Args:
+        missing (str): Comma separated skills, e.g. "Go, Kubernetes."
+
+    Returns:
+        list: Distinct trimmed, lower-cased skills.
+    """
+    if not isinstance(missing, str):
+        return []
+    skills = {skill.strip(" .\t\n").lower() for skill in missing.split(",")}
+    return sorted(skill for skill in skills if skill and len(skill) <= MAX_SKILL_CHARS)
+
+
+def score_bucket(score):
+    """Lower bound of the histogram bucket a score falls into, as a string key."""
+    return str(max(0, min(TOP_SCORE_BUCKET, int(score // SCORE_BUCKET_WIDTH) * SCORE_BUCKET_WIDTH)))
+
+
+def role_evaluations(analysis):
+    """
+    Iterate the scored role evaluations of an analysis.
+
+    Args:
+        analysis (dict): Formatted LLM output with [{"<role>": {...}}] evaluations.
+
+    Yields:
+        tuple: (role, score, recommended, missing skills). Evaluations without
+        a numeric score and pre-screened analyses are skipped.
+    """
+    if analysis.get("prescreened"):
+        return
+    for item in analysis.get("evaluations") or []:
+        if not isinstance(item, dict):
+            continue
+        for role, evaluation in item.items():
+            if not isinstance(evaluation, dict) or not role.strip():
+                continue
+            score = evaluation.get("score")
+            if isinstance(score, bool) or not isinstance(score, (int, float)):
+                continue
+            recommended = str(evaluation.get("status", "")).lower() == "recommended"
+            yield role.strip(), score, recommended, split_skills(evaluation.get("missing"))
+
+
+# Stages shared by the live pipelines: one document per scored role evaluation
+# with the fields role_evaluations() yields. Mirrors its normalization so live
+# results and the incrementally maintained summaries agree.
+_EVALUATION_STAGES = [
+    {"$match": {"analysis.prescreened": {"$ne": True}}},
+    {"$project": {"evaluation": "$analysis.evaluations"}},
+    {"$unwind": "$evaluation"},
+    {"$match": {"evaluation": {"$type": "object"}}},
+    {"$project": {"evaluation": {"$objectToArray": "$evaluation"}}},
+    {"$unwind": "$evaluation"},
+    {"$project": {
+        "_id": 0,
+        "role": {"$trim": {"input": "$evaluation.k"}},
+        "score": "$evaluation.v.score",
+        "recommended": {"$eq": [
+            {"$toLower": {"$convert": {"input": "$evaluation.v.status", "to": "string", "onError": "", "onNull": ""}}},
+            "recommended",
+        ]},
+        "missing": "$evaluation.v.missing",
+    }},
+    {"$match": {"role": {"$ne": ""}, "score": {"$type": "number"}}},
+    {"$addFields": {"key": {"$toLower": "$role"}}},
+]
+
+
+def _match_role(role):
+    return [{"$match": {"key": role_key(role)}}] if role is not None else []
+
+
+def score_pipeline(role=None):
+    """
+    Aggregation over resume_analysis producing one summary-shaped document per
+    role: count, score_sum/min/max, recommended and the score_buckets histogram.
+
+    Args:
+        role (str | None): Restrict to one role; all roles if None.
+
+    Returns:
+        list: Pipeline stages.
+    """
+    bucket = {"$toString": {"$max": [0, {"$min": [
+        TOP_SCORE_BUCKET,
+        {"$multiply": [{"$toInt": {"$floor": {"$divide": ["$score", SCORE_BUCKET_WIDTH]}}}, SCORE_BUCKET_WIDTH]},
+    ]}]}}
+    return _EVALUATION_STAGES + _match_role(role) + [
+        {"$group": {
+            "_id": {"key": "$key", "bucket": bucket},
+            "role": {"$first": "$role"},
+            "count": {"$sum": 1},
+            "score_sum": {"$sum": "$score"},
+            "score_min": {"$min": "$score"},
+            "score_max": {"$max": "$score"},
+            "recommended": {"$sum": {"$cond": ["$recommended", 1, 0]}},
+        }},
+        {"$group": {
+            "_id": "$_id.key",
+            "role": {"$first": "$role"},
+            "count": {"$sum": "$count"},
+            "score_sum": {"$sum": "$score_sum"},
+            "score_min": {"$min": "$score_min"},
+            "score_max": {"$max": "$score_max"},
+            "recommended": {"$sum": "$recommended"},
+            "score_buckets": {"$push": {"k": "$_id.bucket", "v": "$count"}},
+        }},
+        {"$addFields": {"score_buckets": {"$arrayToObject": "$score_buckets"}}},
+    ]
+
+
+def missing_skill_pipeline(role=None):
+    """
+    Aggregation over resume_analysis counting, per role, the evaluations that
+    list each missing skill, as a {"_id": role key, "missing_skills": {...}}
+    document with escaped skill keys.
+
+    Args:
+        role (str | None): Restrict to one role; all roles if None.
+
+    Returns:
+        list: Pipeline stages.
+    """
+    skill = {"$toLower": {"$trim": {"input": "$$skill", "chars": " .\t\n"}}}
+    return _EVALUATION_STAGES + _match_role(role) + [
+        {"$project": {"key": 1, "skills": {"$setUnion": [{"$filter": {
+            "input": {"$map": {
+                "input": {"$split": [
+                    {"$convert": {"input": "$missing", "to": "string", "onError": "", "onNull": ""}}, ",",
+                ]},
+                "as": "skill",
+                "in": skill,
+            }},
+            "as": "skill",
+            "cond": {"$and": [
+                {"$ne": ["$$skill", ""]},
+                {"$lte": [{"$strLenCP": "$$skill"}, MAX_SKILL_CHARS]},
+            ]},
+        }}]}}},
+        {"$unwind": "$skills"},
+        {"$group": {"_id": {"key": "$key", "skill": "$skills"}, "count": {"$sum": 1}}},
+        {"$group": {
+            "_id": "$_id.key",
+            "missing_skills": {"$push": {
+                "k": {"$replaceAll": {
+                    "input": {"$replaceAll": {"input": "$_id.skill", "find": ".", "replacement": _KEY_ESCAPES["."]}},
+                    "find": {"$literal": "$"}, "replacement": _KEY_ESCAPES["$"],
+                }},
+                "v": "$count",
+            }},
+        }},
+        {"$addFields": {"missing_skills": {"$arrayToObject": "$missing_skills"}}},
+    ]
+
+
+def format_summary(document, top_skills=None):
+    """
+    Turn a stored or live role summary into the API response.
+
+    Args:
+        document (dict): Summary with the fields produced by score_pipeline()
+            and, optionally, missing_skill_pipeline().
+        top_skills (int | None): Number of missing skills to return; all if None.
+
+    Returns:
+        dict: Role, analyses, score stats, recommended rate, the score
+        distribution per bucket and the most common missing skills.
+    """
+    count = document.get("count", 0)
+    buckets = document.get("score_buckets") or {}
+    skills = sorted(
+        ((unescape_key(skill), n) for skill, n in (document.get("missing_skills") or {}).items()),
+        key=lambda item: (-item[1], item[0]),
+    )
+    summary = {
+        "role": document.get("role"),
+        "analyses": count,
+        "avg_score": round(document["score_sum"] / count, 2) if count else None,
+        "min_score": document.get("score_min"),
+        "max_score": document.get("score_max"),
+        "recommended": document.get("recommended", 0),
+        "recommended_rate": round(document.get("recommended", 0) / count, 4) if count else 0.0,
+        "score_distribution": [
+            {
+                "range": f"{low}-{low + SCORE_BUCKET_WIDTH - 1 if low < TOP_SCORE_BUCKET else 100}",
+                "count": buckets.get(str(low), 0),
+            }
+            for low in range(0, TOP_SCORE_BUCKET + 1, SCORE_BUCKET_WIDTH)
+        ],
+    }
+    if "missing_skills" in document:
+        summary["top_missing_skills"] = [
+            {"skill": skill, "count": n, "share": round(n / count, 4) if count else 0.0}
+            for skill, n in skills[:top_skills]
+        ]
+    return summary
+
+
+async def live_role_summary(source, role, top_skills):
+    """
+    Compute one role's summary directly from the analyses, scanning all of
+    them. Used to check the stored summaries, not for dashboards.
+
+    Args:
+        source: Motor collection of analysis records (resume_analysis).
+        role (str): Role name (case-insensitive).
+        top_skills (int): Number of missing skills to return.
+
+    Returns:
+        dict | None: format_summary() output, or None if no analysis scored the role.
+    """
+    scores = await source.aggregate(score_pipeline(role)).to_list(1)
+    if not scores:
+        return None
+    skills = await source.aggregate(missing_skill_pipeline(role)).to_list(1)
+    document = scores[0]
+    document["missing_skills"] = skills[0]["missing_skills"] if skills else {}
+    return format_summary(document, top_skills)
+
+
+class RoleSummaryStore:
+    """
+    Per-role aggregates of stored analyses (score histogram, recommendation
+    count, missing-skill counts), kept up to date with $inc upserts as
+    analyses are inserted. Dashboards read one document per role instead of
+    aggregating every analysis. rebuild() recomputes everything from
+    resume_analysis with the live pipelines.
+    """
+
+    def __init__(self, collection):
+        """
+        Args:
+            collection: Motor collection holding one document per role key.
+        """
+        self.collection = collection
+
+    async def record(self, analyses):
+        """
+        Add analyses to the summaries. Evaluations of the same role are merged
+        into one update, so a batch against one JD costs one write per role.
+        Failures are logged, not raised: the analyses are already stored and a
+        rebuild() restores the counts.
+
+        Args:
+            analyses (Iterable[dict]): Formatted LLM outputs that were just stored.
+        """
+        updates = {}
+        for analysis in analyses:
+            for role, score, recommended, skills in role_evaluations(analysis):
+                update = updates.setdefault(role_key(role), {
+                    "role": role, "inc": {}, "min": score, "max": score,
+                })
+                inc = update["inc"]
+                for field, amount in [
+                    ("count", 1),
+                    ("score_sum", score),
+                    ("recommended", int(recommended)),
+                    (f"score_buckets.{score_bucket(score)}", 1),
+                ] + [(f"missing_skills.{escape_key(skill)}", 1) for skill in skills]:
+                    inc[field] = inc.get(field, 0) + amount
+                update["min"] = min(update["min"], score)
+                update["max"] = max(update["max"], score)
+        if not updates:
+            return
+
+        now = datetime.datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {
+                    "$inc": update["inc"],
+                    "$min": {"score_min": update["min"]},
+                    "$max": {"score_max": update["max"]},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"role": update["role"]},
+                },
+                upsert=True,
+            )
+            for key, update in updates.items()
+        ]
+        try:
+            with metrics.timer("role_summaries.update_latency"):
+                await self.collection.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.error("Role summaries not updated for %d role(s): %s", len(operations), e)
+            metrics.increment("role_summaries.update_failed")
+            return
+        metrics.increment("role_summaries.updated", len(operations))
+
+    async def adjust_recommended(self, changes):
+        """
+        Apply re-thresholding to the recommended counts.
+
+        Args:
+            changes (dict): {role_key: (newly recommended, no longer recommended)}.
+        """
+        operations = [
+            UpdateOne({"_id": key}, {"$inc": {"recommended": promoted - demoted}})
+            for key, (promoted, demoted) in changes.items()
+            if promoted != demoted
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def list_roles(self, limit):
+        """
+        Get the summaries of the roles with the most analyses.
+
+        Args:
+            limit (int): Maximum number of roles.
+
+        Returns:
+            list: format_summary() output per role, without missing skills.
+        """
+        cursor = self.collection.find({}, {"missing_skills": 0}).sort("count", -1).limit(limit)
+        return [format_summary(document) async for document in cursor]
+
+    async def get_role(self, role, top_skills):
+        """
+        Get one role's summary.
+
+        Args:
+            role (str): Role name (case-insensitive).
+            top_skills (int): Number of missing skills to return.
+
+        Returns:
+            dict | None: format_summary() output, or None for an unknown role.
+        """
+        document = await self.collection.find_one({"_id": role_key(role)})
+        return format_summary(document, top_skills) if document else None
+
+    async def rebuild(self, source):
+        """
+        Recompute every summary from the analyses in source. The pipelines
+        write a scratch collection that then replaces this one, so readers
+        never see partial results. Analyses stored while it runs may be missed;
+        run it when uploads are paused.
+
+        Args:
+            source: Motor collection of analysis records (resume_analysis).
+
+        Returns:
+            int: Number of role summaries written.
+        """
+        scratch = f"{self.collection.name}_rebuild"
+        await source.aggregate(score_pipeline() + [{"$out": scratch}]).to_list(None)
+        await source.aggregate(missing_skill_pipeline() + [{"$merge": {
+            "into": scratch, "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard",
+        }}]).to_list(None)
+        database = self.collection.database
+        now = datetime.datetime.utcnow()
+        await database[scratch].update_many({}, {"$set": {"updated_at": now}})
+        await database[scratch].rename(self.collection.name, dropTarget=True)
+        return await self.collection.count_documents({})
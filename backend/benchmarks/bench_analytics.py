@@ -0,0 +1,116 @@
+"""
+Benchmark role analytics: live aggregation over every analysis vs reading the
+incrementally maintained role summaries.
+
+Fills a scratch database on the configured MongoDB with synthetic analyses
+(1-3 role evaluations each, scores and missing skills drawn at random),
+maintaining the summaries the way the upload endpoints do. It then reports the
+per-analysis cost of the summary update, the full rebuild time, and p50/p95
+latency of a role's dashboard query from each source. It also checks that the
+two sources agree. The scratch database is dropped afterwards unless --keep
+is given.
+
+Run from the backend folder:  python -m benchmarks.bench_analytics [--analyses N] [--roles N]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import constants
+import database
+from analytics import RoleSummaryStore, live_role_summary
+from prescreen import SKILL_VOCABULARY
+
+INSERT_BATCH = 1000
+
+
+def make_analysis(rng, roles, skills):
+    evaluations = []
+    for role in rng.sample(roles, rng.randint(1, 3)):
+        score = rng.randint(20, 100)
+        evaluations.append({role: {
+            "score": score,
+            "status": "recommended" if score >= 70 else "not recommended",
+            "matchedSkills": ", ".join(rng.sample(skills, 4)),
+            "missing": ", ".join(rng.sample(skills, rng.randint(0, 5))),
+            "suggest": "",
+            "summary": "",
+        }})
+    return {"candidateName": "Candidate", "overall_score": rng.randint(20, 100), "evaluations": evaluations}
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+async def timed(repeats, query):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await query()
+        samples.append(time.perf_counter() - start)
+    return result, percentiles(samples)
+
+
+async def run(args):
+    database.init_database()
+    db = database.mongo_client[args.database]
+    analyses, summaries = db["resume_analysis"], RoleSummaryStore(db["role_summaries"])
+    rng = random.Random(args.seed)
+    roles = [f"Role {index}" for index in range(args.roles)]
+    skills = sorted(SKILL_VOCABULARY)
+    try:
+        await db.drop_collection("resume_analysis")
+        await db.drop_collection("role_summaries")
+
+        insert_time = summary_time = 0.0
+        for offset in range(0, args.analyses, INSERT_BATCH):
+            batch = [make_analysis(rng, roles, skills) for _ in range(min(INSERT_BATCH, args.analyses - offset))]
+            start = time.perf_counter()
+            await analyses.insert_many([{"file_id": f"bench-{offset + i}", "analysis": a} for i, a in enumerate(batch)])
+            insert_time += time.perf_counter() - start
+            # One update per analysis, as upload_resume does
+            start = time.perf_counter()
+            await asyncio.gather(*(summaries.record([analysis]) for analysis in batch))
+            summary_time += time.perf_counter() - start
+        print(f"{args.analyses:,} analyses, {args.roles} roles")
+        print(f"insert: {insert_time / args.analyses * 1e6:.0f} us/analysis, "
+              f"summary update: {summary_time / args.analyses * 1e6:.0f} us/analysis")
+
+        role = roles[0]
+        live, (live_p50, live_p95) = await timed(args.repeats, lambda: live_role_summary(analyses, role, 20))
+        stored, (stored_p50, stored_p95) = await timed(args.repeats, lambda: summaries.get_role(role, 20))
+        _, (list_p50, list_p95) = await timed(args.repeats, lambda: summaries.list_roles(50))
+        print(f"{'query':<26} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'role detail, live':<26} {live_p50 * 1e3:8.2f} {live_p95 * 1e3:8.2f}")
+        print(f"{'role detail, summary':<26} {stored_p50 * 1e3:8.2f} {stored_p95 * 1e3:8.2f}")
+        print(f"{'role list, summary':<26} {list_p50 * 1e3:8.2f} {list_p95 * 1e3:8.2f}")
+        print(f"summary matches live: {live == stored}")
+
+        start = time.perf_counter()
+        await summaries.rebuild(analyses)
+        print(f"rebuild: {time.perf_counter() - start:.2f}s, "
+              f"matches live: {await summaries.get_role(role, 20) == live}")
+    finally:
+        if not args.keep:
+            await database.mongo_client.drop_database(args.database)
+        database.close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=100_000)
+    parser.add_argument("--roles", type=int, default=25)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", default=f"{constants.MONGO_DB}_bench", help="scratch database, dropped afterwards")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark compression of stored texts.
+
+Builds a corpus of normalized resume-like texts and, for each available codec,
+reports the compression ratio, the write and read cost per document (codec
+plus BSON encode/decode, i.e. everything but the network round trip) and the
+resulting size of the documents collection. The generated text draws on a
+small vocabulary, so it compresses better than real resumes; treat the ratios
+as an upper bound and the latencies as typical.
+
+Run from the backend folder:  python -m benchmarks.bench_compression [--docs N]
+"""
+import argparse
+import random
+import time
+
+import bson
+
+from benchmarks.bench_normalize import make_page
+from compression import TEXT_CODECS, check_codec, compress_text, decompress_text
+from constants import TEXT_COMPRESSION_MIN_BYTES
+from prescreen import SKILL_VOCABULARY
+from text_normalize import normalize_pages
+
+
+def make_corpus(docs, seed):
+    """Normalized texts of 1-6 page documents."""
+    rng = random.Random(seed)
+    skills = [skill for skill in SKILL_VOCABULARY if skill.isalpha()]
+    corpus = []
+    for _ in range(docs):
+        page_count = rng.randint(1, 6)
+        pages = [make_page(rng, number, page_count, rng.sample(skills, 20)) for number in range(1, page_count + 1)]
+        corpus.append(normalize_pages(pages))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs, args.seed)
+    print(f"corpus: {len(corpus)} texts, {sum(len(text) for text in corpus) / len(corpus) / 1024:.1f} KB average")
+    print(f"{'codec':<6} {'ratio':>6} {'write us':>9} {'read us':>8} {'collection':>12} {'saved':>7}")
+
+    baseline = None
+    for codec in TEXT_CODECS:
+        try:
+            check_codec(codec)
+        except ValueError as e:
+            print(f"{codec:<6} skipped: {e}")
+            continue
+
+        start = time.perf_counter()
+        encoded = []
+        stored_text = 0
+        for text in corpus:
+            value, used = compress_text(text, codec, TEXT_COMPRESSION_MIN_BYTES)
+            stored_text += len(value) if used else len(value.encode("utf-8"))
+            document = {"text": value, "chars": len(text)}
+            if used:
+                document["codec"] = used
+            encoded.append(bson.encode(document))
+        write = (time.perf_counter() - start) / len(corpus)
+
+        start = time.perf_counter()
+        for raw in encoded:
+            document = bson.decode(raw)
+            decompress_text(document["text"], document.get("codec"))
+        read = (time.perf_counter() - start) / len(corpus)
+
+        size = sum(len(raw) for raw in encoded)
+        baseline = baseline or size
+        raw_text = sum(len(text.encode("utf-8")) for text in corpus)
+        print(
+            f"{codec:<6} {raw_text / stored_text:6.2f} {write * 1e6:9.1f} {read * 1e6:8.1f} "
+            f"{size / 1024 / 1024:9.2f} MB {1 - size / baseline:7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the extracted-text normalization stage.
+
+Generates PyPDF2-like page texts (running header and footer, page numbers,
+hyphenated line breaks, ragged whitespace) from known clean text and reports
+normalization throughput, the size reduction, how many words broken across
+lines were repaired, how closely the normalized words match the clean text,
+and whether every skill in the clean text is found in the normalized text.
+
+Run from the backend folder:  python -m benchmarks.bench_normalize [--pages N] [--rounds R]
+"""
+import argparse
+import difflib
+import random
+import time
+from collections import Counter
+
+from prescreen import SKILL_VOCABULARY, extract_skills
+from text_normalize import normalize_pages
+
+WORDS = (
+    "responsible for delivering features working with cross functional teams "
+    "improved reliability reduced latency designed implemented maintained "
+    "services customers stakeholders requirements documentation quality"
+).split()
+
+
+def make_page(rng, number, page_count, skills):
+    """
+    Build one page of noisy extracted text.
+
+    Returns:
+        tuple: (page, clean, broken) with the noisy page text, its body as
+        clean text, and the words broken across lines.
+    """
+    lines = ["Jane  Doe  |  jane.doe@example.com  |  +1 555 0100", "Curriculum   Vitae", ""]
+    clean = []
+    broken = []
+    for _ in range(45):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+        words.insert(rng.randrange(len(words)), rng.choice(skills))
+        if rng.random() < 0.2:
+            words.append(rng.choice(WORDS))
+        clean.append(" ".join(words))
+        noisy = list(words)
+        if len(words[-2]) > 3 and rng.random() < 0.2:
+            # Break a word across lines as PDF extraction often does
+            word = words[-2]
+            cut = len(word) // 2
+            noisy[-2] = f"{word[:cut]}-\n{word[cut:]}"
+            broken.append(word)
+        line = (" " * rng.randint(1, 3)).join(noisy)
+        lines.append("  " + line + "   ")
+        if rng.random() < 0.1:
+            lines.append("\n\n")
+    lines += ["", f"Page {number} of {page_count}", "Confidential - generated for benchmarking"]
+    return "\n".join(lines), "\n".join(clean), broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40, help="pages per document")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skills = [skill for skill in SKILL_VOCABULARY if skill.isalpha()]
+    generated = [make_page(rng, number, args.pages, skills) for number in range(1, args.pages + 1)]
+    pages = [page for page, _, _ in generated]
+    clean = "\n".join(text for _, text, _ in generated)
+    broken = [word for _, _, words in generated for word in words]
+    raw = "\n".join(pages) + "\n"
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        normalized = normalize_pages(pages)
+    seconds = (time.perf_counter() - start) / args.rounds
+
+    # Broken words found whole in the normalized text, each counted once
+    words = Counter(normalized.split())
+    repaired = 0
+    for word in broken:
+        if words[word]:
+            words[word] -= 1
+            repaired += 1
+    # Headers, footers and page numbers are expected to go; the body should match the clean text
+    body_words = [word for word in normalized.split() if word in set(clean.split())]
+    fidelity = difflib.SequenceMatcher(None, clean.split(), body_words, autojunk=False).ratio()
+    lost = extract_skills(clean) - extract_skills(normalized)
+    print(f"document   : {args.pages} pages, {len(raw):,} chars")
+    print(f"normalized : {len(normalized):,} chars ({1 - len(normalized) / len(raw):.1%} smaller, "
+          f"~{(len(raw) - len(normalized)) // 4:,} tokens saved)")
+    print(f"throughput : {len(raw) / seconds / 1e6:.2f} M chars/s ({seconds * 1e3:.2f} ms per document)")
+    print(f"repaired   : {repaired} of {len(broken)} words broken across lines")
+    print(f"fidelity   : {fidelity:.4f} of the clean text's words, in order")
+    print(f"skills lost: {len(lost)} {sorted(lost) if lost else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Benchmark the PDF extraction backends.
+
+Generates resume-like PDFs with known text in four kinds: short text documents,
+large documents, image-heavy documents (a noise image under the text of every
+page) and multi-font documents (standard 14 fonts mixed line by line). The
+corpus is written to a directory once; every backend then runs in its own
+subprocess, imports its library, then resets its peak RSS and takes the
+baseline before reading the documents from disk one at a time, so the
+reported growth is extraction's own. RSS is read from /proc (Linux only):
+ru_maxrss would carry the parent's peak over exec.
+Reports pages per second, peak RSS, RSS growth and text fidelity against the
+generated text, per backend and kind.
+
+Run from the backend folder:  python -m benchmarks.bench_pdf_extract [--docs N] [--pages P]
+"""
+import argparse
+import difflib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+from pdf_extract import available_backends, extract_pages
+
+WORDS = (
+    "python fastapi mongodb docker kubernetes designed implemented services "
+    "improved latency reduced costs led team delivered features customers "
+    "reliability (99.9%) pipelines data analysis machine learning react node.js"
+).split()
+
+FONTS = ("Helvetica", "Times-Roman", "Courier", "Helvetica-Bold", "Times-Italic", "Courier-BoldOblique")
+
+KINDS = ("text", "large", "images", "fonts")
+
+
+def make_lines(rng, line_count):
+    """Build random resume-like text lines."""
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))) for _ in range(line_count)]
+
+
+def make_image(rng, width, height):
+    """A Flate-compressed RGB noise image, which barely compresses."""
+    return width, height, zlib.compress(rng.randbytes(width * height * 3), 1)
+
+
+def make_pdf(pages, fonts=("Helvetica",), images=None):
+    """
+    Write a minimal PDF with one text line per entry.
+
+    Args:
+        pages (list): One list of text lines per page.
+        fonts (tuple): Standard 14 fonts, used line by line in turn.
+        images (list | None): One (width, height, flate_data) image per page,
+            drawn under the text.
+
+    Returns:
+        bytes: The PDF file contents.
+    """
+    objects = [None, None]
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_ids = [add(f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} >>") for font in fonts]
+    font_resources = " ".join(f"/F{index} {font_id} 0 R" for index, font_id in enumerate(font_ids))
+    page_ids = []
+    for page_index, lines in enumerate(pages):
+        resources = f"/Font << {font_resources} >>"
+        content = ""
+        if images:
+            width, height, data = images[page_index]
+            image_id = add(
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB "
+                f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode("latin-1")
+                + data + b"\nendstream"
+            )
+            resources += f" /XObject << /Im0 {image_id} 0 R >>"
+            content = "q 512 0 0 692 50 50 cm /Im0 Do Q "
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        content += "BT 50 760 Td 13 TL " + " ".join(
+            f"/F{index % len(fonts)} 10 Tf ({line}) Tj T*" for index, line in enumerate(escaped)
+        ) + " ET"
+        content_id = add(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << {resources} >> /Contents {content_id} 0 R >>"
+        ))
+    objects[0] = "<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for index, body in enumerate(objects):
+        offsets.append(len(out))
+        body = body if isinstance(body, bytes) else body.encode("latin-1")
+        out += f"{index + 1} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_document(rng, kind, pages, large_pages):
+    """Generate one (pdf_bytes, expected_text) pair of a kind."""
+    if kind == "large":
+        content = [make_lines(rng, 55) for _ in range(large_pages)]
+    else:
+        content = [make_lines(rng, 55) for _ in range(rng.randint(1, pages))]
+    if kind == "images":
+        pdf_bytes = make_pdf(content, images=[make_image(rng, 600, 800) for _ in content])
+    elif kind == "fonts":
+        pdf_bytes = make_pdf(content, fonts=FONTS)
+    else:
+        pdf_bytes = make_pdf(content)
+    return pdf_bytes, "\n".join("\n".join(lines) for lines in content)
+
+
+def write_corpus(directory, docs, pages, large_pages, seed):
+    """Write docs documents of every kind as <kind>-<n>.pdf plus the expected <kind>-<n>.txt."""
+    rng = random.Random(seed)
+    sizes = {}
+    for kind in KINDS:
+        sizes[kind] = 0
+        for index in range(docs):
+            pdf_bytes, expected = make_document(rng, kind, pages, large_pages)
+            with open(os.path.join(directory, f"{kind}-{index}.pdf"), "wb") as f:
+                f.write(pdf_bytes)
+            with open(os.path.join(directory, f"{kind}-{index}.txt"), "w") as f:
+                f.write(expected)
+            sizes[kind] += len(pdf_bytes)
+    return sizes
+
+
+def fidelity(expected, actual):
+    """Similarity of the word sequences, 1.0 meaning identical."""
+    return difflib.SequenceMatcher(None, expected.split(), actual.split(), autojunk=False).ratio()
+
+
+def reset_peak_rss():
+    """Reset this process's peak RSS (VmHWM) to its current RSS."""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def rss_mb(field):
+    """VmRSS (current) or VmHWM (peak) of this process, in MB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not found in /proc/self/status")
+
+
+def run_backend(backend, directory, kind, docs, max_pages):
+    """Extract one kind of the corpus with one backend and print its results as JSON."""
+    # Import the backend and its lazily loaded modules before the baseline
+    extract_pages(make_pdf([["warm up"]]), 0, 1, float("inf"), backend)
+    reset_peak_rss()
+    baseline_rss = rss_mb("VmRSS")
+
+    seconds = 0.0
+    page_count = 0
+    scores = []
+    for index in range(docs):
+        with open(os.path.join(directory, f"{kind}-{index}.pdf"), "rb") as f:
+            pdf_bytes = f.read()
+        start = time.perf_counter()
+        pages = extract_pages(pdf_bytes, 0, max_pages, float("inf"), backend)[0]
+        seconds += time.perf_counter() - start
+        del pdf_bytes
+        with open(os.path.join(directory, f"{kind}-{index}.txt")) as f:
+            scores.append(fidelity(f.read(), "\n".join(pages)))
+        page_count += len(pages)
+
+    peak_rss = rss_mb("VmHWM")
+    print(json.dumps({
+        "backend": backend,
+        "kind": kind,
+        "pages": page_count,
+        "seconds": seconds,
+        "pages_per_second": page_count / seconds,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss,
+        "extra_rss_mb": peak_rss - baseline_rss,
+        "fidelity_mean": sum(scores) / len(scores),
+        "fidelity_min": min(scores),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10, help="documents per kind")
+    parser.add_argument("--pages", type=int, default=8, help="maximum pages per document, except large ones")
+    parser.add_argument("--large-pages", type=int, default=60, help="pages per large document")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--corpus", help="corpus directory; generated into a temporary one if not given")
+    parser.add_argument("--kind", choices=KINDS, help="with --backend, the kind of documents to extract")
+    parser.add_argument("--backend", help="run a single backend on --corpus in this process")
+    args = parser.parse_args()
+    max_pages = max(args.pages, args.large_pages)
+
+    if args.backend:
+        run_backend(args.backend, args.corpus, args.kind, args.docs, max_pages)
+        return
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.corpus or scratch
+        if not os.path.exists(os.path.join(directory, f"{KINDS[-1]}-{args.docs - 1}.pdf")):
+            os.makedirs(directory, exist_ok=True)
+            sizes = write_corpus(directory, args.docs, args.pages, args.large_pages, args.seed)
+            print("corpus: " + ", ".join(f"{args.docs} {kind} ({size / 2**20:.1f} MB)" for kind, size in sizes.items()))
+        print(f"{'backend':<10} {'kind':<7} {'pages/s':>10} {'base RSS MB':>12} {'peak RSS MB':>12} "
+              f"{'+RSS MB':>8} {'fidelity':>9} {'worst':>7}")
+        for backend in available_backends():
+            for kind in KINDS:
+                completed = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pdf_extract", "--backend", backend,
+                     "--corpus", directory, "--kind", kind, "--docs", str(args.docs),
+                     "--pages", str(args.pages), "--large-pages", str(args.large_pages)],
+                    capture_output=True,
+                    text=True,
+                )
+                if completed.returncode != 0:
+                    print(f"{backend:<10} {kind:<7} failed: {completed.stderr.strip().splitlines()[-1]}")
+                    continue
+                result = json.loads(completed.stdout)
+                print(
+                    f"{backend:<10} {kind:<7} {result['pages_per_second']:10.1f} {result['baseline_rss_mb']:12.1f} "
+                    f"{result['peak_rss_mb']:12.1f} {result['extra_rss_mb']:8.1f} "
+                    f"{result['fidelity_mean']:9.4f} {result['fidelity_min']:7.4f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark the local pre-screen scorer.
+
+Generates synthetic resumes and job descriptions from the skill vocabulary and
+reports screens per second with a cold JD (first sight, skills extracted) and
+a warm JD (skills memoized, as when one JD is screened against many resumes).
+
+Run from the backend folder:  python -m benchmarks.bench_prescreen [--resumes N] [--words W]
+"""
+import argparse
+import random
+import time
+
+from prescreen import SKILL_VOCABULARY, extract_skills, score_overlap
+
+FILLER = (
+    "responsible for delivering features working with cross functional teams "
+    "improved reliability reduced latency designed implemented maintained "
+    "services customers stakeholders requirements documentation quality"
+).split()
+
+
+def make_document(rng, skills, words):
+    """Build a text of roughly `words` words with the given skills sprinkled in."""
+    tokens = [rng.choice(FILLER) for _ in range(words)]
+    for skill in skills:
+        tokens.insert(rng.randrange(len(tokens) + 1), skill)
+    return " ".join(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=800, help="words per resume")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = list(SKILL_VOCABULARY)
+    jd = make_document(rng, rng.sample(vocabulary, 12), 300)
+    resumes = [make_document(rng, rng.sample(vocabulary, 25), args.words) for _ in range(args.resumes)]
+
+    start = time.perf_counter()
+    extract_skills.cache_clear()
+    for resume in resumes:
+        extract_skills.cache_clear()
+        score_overlap(resume, jd)
+    cold = time.perf_counter() - start
+
+    extract_skills.cache_clear()
+    start = time.perf_counter()
+    for resume in resumes:
+        score_overlap(resume, jd)
+    warm = time.perf_counter() - start
+
+    total_words = args.resumes * args.words
+    print(f"resumes: {args.resumes} x ~{args.words} words, JD skills: {len(extract_skills(jd))}")
+    print(f"cold JD : {args.resumes / cold:10.1f} screens/s  ({cold / args.resumes * 1e3:.3f} ms each)")
+    print(f"warm JD : {args.resumes / warm:10.1f} screens/s  ({warm / args.resumes * 1e3:.3f} ms each)")
+    print(f"tokenize: {total_words / warm / 1e6:10.2f} M resume words/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark re-thresholding every analysis of one job description.
+
+Fills a scratch database on the configured MongoDB with N analyses against a
+single JD (with their evaluation rows and role summaries, as the upload
+endpoints store them). It then times rethreshold_analyses() at a few
+thresholds and checks that the records, the evaluation rows and the role
+summaries agree afterwards. No LLM is involved. The scratch database is
+dropped afterwards unless --keep is given.
+
+Run from the backend folder:  python -m benchmarks.bench_rethreshold [--analyses N]
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+
+import constants
+import database
+import resume_analyzer
+from benchmarks.bench_analytics import INSERT_BATCH, make_analysis
+from prescreen import SKILL_VOCABULARY
+
+JD_HASH = "bench-jd"
+
+
+async def run(args):
+    database.init_database()
+    db = database.mongo_client[args.database]
+    resume_analyzer.bind_database(db)
+    rng = random.Random(args.seed)
+    roles = [f"Role {index}" for index in range(args.roles)]
+    skills = sorted(SKILL_VOCABULARY)
+    try:
+        for name in ("resume_analysis", "evaluations", "role_summaries"):
+            await db.drop_collection(name)
+        await resume_analyzer.files_collection.create_index("job_description_hash")
+        await resume_analyzer.evaluation_store.collection.create_index([("jd_hash", 1), ("score", -1), ("_id", -1)])
+
+        for offset in range(0, args.analyses, INSERT_BATCH):
+            records = [
+                {
+                    "file_id": f"bench-{offset + index}",
+                    "job_description_hash": JD_HASH,
+                    "recommended_store": 70,
+                    "created_at": datetime.datetime.utcnow(),
+                    "analysis": make_analysis(rng, roles, skills),
+                }
+                for index in range(min(INSERT_BATCH, args.analyses - offset))
+            ]
+            await resume_analyzer.files_collection.insert_many(records)
+            await resume_analyzer.role_summaries.record(record["analysis"] for record in records)
+            await resume_analyzer.evaluation_store.add(records)
+        print(f"{args.analyses:,} analyses against one JD, {args.roles} roles")
+
+        for threshold in (50, 85, 70):
+            start = time.perf_counter()
+            result = await resume_analyzer.rethreshold_analyses(
+                {"job_description_hash": JD_HASH}, {"jd_hash": JD_HASH}, threshold
+            )
+            elapsed = time.perf_counter() - start
+            print(f"threshold {threshold:>3}: {elapsed:.2f}s, {result['analyses']:,} analyses, "
+                  f"{result['evaluations_changed']:,} statuses changed")
+
+        rows = await resume_analyzer.evaluation_store.collection.count_documents(
+            {"jd_hash": JD_HASH, "status": "recommended"}
+        )
+        summaries = sum([
+            summary["recommended"] for summary in await resume_analyzer.role_summaries.list_roles(args.roles)
+        ])
+        counts = await resume_analyzer.files_collection.aggregate([
+            {"$group": {"_id": None, "recommended": {"$sum": "$summary.recommended_count"}}},
+        ]).to_list(1)
+        records = await resume_analyzer.files_collection.count_documents({"recommended_store": 70})
+        print(f"recommended: rows {rows:,}, role summaries {summaries:,}, "
+              f"records at threshold 70: {records:,}, summary counts {counts[0]['recommended'] if counts else 0:,}")
+    finally:
+        if not args.keep:
+            await database.mongo_client.drop_database(args.database)
+        database.close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=10_000)
+    parser.add_argument("--roles", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", default=f"{constants.MONGO_DB}_bench", help="scratch database, dropped afterwards")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from compression import compress_text, decompress_text
+
+
+def normalize_for_hash(text):
+    """
+    Normalize extracted text so that insignificant whitespace differences
+    between two extractions of the same document produce the same hash.
+
+    Args:
+        text (str): Raw extracted text.
+
+    Returns:
+        str: Text with all whitespace runs collapsed to single spaces.
+    """
+    return " ".join((text or "").split())
+
+
+def make_analysis_key(resume_text, job_description_text, recommended_store, model, prompt_version):
+    """
+    Build the content-addressed cache key for an analysis.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        model (str): Gemini model name.
+        prompt_version (str): Version of the prompt template.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the analysis inputs.
+    """
+    payload = json.dumps(
+        [
+            normalize_for_hash(resume_text),
+            normalize_for_hash(job_description_text),
+            int(recommended_store),
+            model,
+            prompt_version,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_resume_key(resume_text, model, prompt_version):
+    """
+    Build the cache key for a structured (parsed) resume.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        model (str): Gemini model name.
+        prompt_version (str): Version of the structuring prompt.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the resume structuring inputs.
+    """
+    payload = json.dumps([normalize_for_hash(resume_text), model, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional per-entry TTL.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept in memory.
+            ttl (float | None): Seconds an entry stays valid, or None for no expiry.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a value and mark it as most recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Any: The cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key (str): Cache key.
+            value (Any): Value to cache.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Remove a key from the cache if present.
+
+        Args:
+            key (str): Cache key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SizedLRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by the total size of its values
+    in bytes rather than by entry count.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum total size of cached values.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a value and mark it as most recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Any: The cached value, or None on a miss.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, size):
+        """
+        Store a value, evicting the least recently used entries until it fits.
+
+        Args:
+            key (str): Cache key.
+            value (Any): Value to cache.
+            size (int): Size of the value in bytes.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def invalidate(self, key):
+        """
+        Remove a key from the cache if present.
+
+        Args:
+            key (str): Cache key.
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TextExtractionCache:
+    """
+    Two-tier cache of extracted PDF text keyed by the SHA-256 of the PDF bytes:
+    a byte-bounded in-process LRU in front of a persistent MongoDB collection.
+    Entries written by a different extraction version are treated as misses.
+    Texts are compressed in MongoDB and kept decompressed in memory.
+    """
+
+    def __init__(self, collection, max_bytes, version, codec="none", min_bytes=0):
+        """
+        Args:
+            collection: Motor collection used as the persistent tier.
+            max_bytes (int): Maximum total size of text held in memory.
+            version (str): Extraction version; bump it when extraction output changes.
+            codec (str): Codec for texts written to MongoDB (compression.TEXT_CODECS).
+            min_bytes (int): Texts smaller than this are stored uncompressed.
+        """
+        self.collection = collection
+        self.memory = SizedLRUCache(max_bytes)
+        self.version = version
+        self.codec = codec
+        self.min_bytes = min_bytes
+
+    async def get(self, digest, pdf_size):
+        """
+        Look up extracted text, first in memory and then in MongoDB.
+
+        Args:
+            digest (str): Hex SHA-256 of the PDF bytes.
+            pdf_size (int): Size of the PDF in bytes, counted as saved on a hit.
+
+        Returns:
+            tuple | None: (text, info) as returned by extraction, or None on a miss.
+        """
+        entry = self.memory.get(digest)
+        if entry is None:
+            document = await self.collection.find_one(
+                {"_id": digest, "version": self.version}, {"text": 1, "codec": 1, "info": 1}
+            )
+            if document is not None:
+                entry = (decompress_text(document["text"], document.get("codec")), document["info"])
+                self.memory.set(digest, entry, len(entry[0].encode("utf-8")))
+                metrics.increment("text_cache.hit.mongo")
+        else:
+            metrics.increment("text_cache.hit.memory")
+
+        if entry is None:
+            metrics.increment("text_cache.miss")
+            return None
+        metrics.increment("text_cache.hit")
+        metrics.increment("text_cache.bytes_saved", pdf_size)
+        return entry
+
+    async def set(self, digest, text, info, pdf_size):
+        """
+        Store extracted text in both tiers.
+
+        Args:
+            digest (str): Hex SHA-256 of the PDF bytes.
+            text (str): Extracted text.
+            info (dict): Extraction info (pages, seconds).
+            pdf_size (int): Size of the PDF in bytes.
+        """
+        self.memory.set(digest, (text, info), len(text.encode("utf-8")))
+        value, codec = compress_text(text, self.codec, self.min_bytes)
+        update = {
+            "$set": {
+                "text": value,
+                "info": info,
+                "version": self.version,
+                "pdf_size": pdf_size,
+                "created_at": datetime.datetime.utcnow(),
+            }
+        }
+        if codec is not None:
+            update["$set"]["codec"] = codec
+        else:
+            update["$unset"] = {"codec": ""}
+        await self.collection.update_one({"_id": digest}, update, upsert=True)
+
+    def stats(self):
+        """
+        Get hit rate and savings for the cache.
+
+        Returns:
+            dict: Hit and miss counts, hit ratio, PDF bytes whose parsing was
+            skipped, and in-memory usage.
+        """
+        hits = metrics.get_counter("text_cache.hit")
+        misses = metrics.get_counter("text_cache.miss")
+        total = hits + misses
+        return {
+            "hits": hits,
+            "memory_hits": metrics.get_counter("text_cache.hit.memory"),
+            "mongo_hits": metrics.get_counter("text_cache.hit.mongo"),
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "bytes_saved": metrics.get_counter("text_cache.bytes_saved"),
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes,
+            "memory_max_bytes": self.memory.max_bytes,
+            "version": self.version,
+        }
+
+
+class AnalysisRecordCache:
+    """
+    Byte-bounded in-process read-through cache of stored analysis records
+    keyed by file_id. Records only change through explicit updates, which must
+    call invalidate(); the TTL bounds how long other worker processes, which
+    do not see that call, can serve the old version.
+    """
+
+    def __init__(self, max_bytes, ttl=None, name="record_cache"):
+        """
+        Args:
+            max_bytes (int): Maximum total (JSON-encoded) size of cached records.
+            ttl (float | None): Seconds a record stays valid, or None for no expiry.
+            name (str): Metrics prefix for hit/miss counters.
+        """
+        self.memory = SizedLRUCache(max_bytes)
+        self.ttl = ttl
+        self.name = name
+
+    def get(self, file_id):
+        """
+        Get a cached record.
+
+        Args:
+            file_id (str): Record file_id.
+
+        Returns:
+            dict | None: The record, or None on a miss.
+        """
+        entry = self.memory.get(file_id)
+        record = None
+        if entry is not None:
+            record, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self.memory.invalidate(file_id)
+                record = None
+        metrics.increment(f"{self.name}.hit" if record is not None else f"{self.name}.miss")
+        return record
+
+    def set(self, file_id, record):
+        """
+        Cache a record loaded from MongoDB.
+
+        Args:
+            file_id (str): Record file_id.
+            record (dict): The record, with JSON-serializable values.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self.memory.set(file_id, (record, expires_at), len(json.dumps(record, ensure_ascii=False)))
+
+    def invalidate(self, file_ids):
+        """
+        Drop records that were modified or deleted.
+
+        Args:
+            file_ids (Iterable[str]): file_ids of the changed records.
+        """
+        for file_id in file_ids:
+            self.memory.invalidate(file_id)
+            metrics.increment(f"{self.name}.invalidated")
+
+    def stats(self):
+        """
+        Get hit rate and memory use.
+
+        Returns:
+            dict: Hit and miss counts, hit ratio, invalidations and the
+            number and total size of cached records.
+        """
+        hits = metrics.get_counter(f"{self.name}.hit")
+        misses = metrics.get_counter(f"{self.name}.miss")
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "invalidated": metrics.get_counter(f"{self.name}.invalidated"),
+            "not_modified": metrics.get_counter(f"{self.name}.not_modified"),
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes,
+            "memory_max_bytes": self.memory.max_bytes,
+        }
+
+
+class AnalysisCache:
+    """
+    Two-tier cache for LLM outputs: an in-process LRU in front of a
+    persistent MongoDB collection. Keys are content hashes such as those from
+    make_analysis_key() or make_resume_key().
+    """
+
+    def __init__(self, collection, maxsize, ttl, name="analysis_cache"):
+        """
+        Args:
+            collection: Motor collection used as the persistent tier.
+            maxsize (int): Maximum number of analyses held in memory.
+            ttl (float): Seconds an analysis stays in the memory tier.
+            name (str): Metrics prefix for hit/miss counters.
+        """
+        self.collection = collection
+        self.memory = LRUCache(maxsize, ttl)
+        self.name = name
+
+    async def get(self, key):
+        """
+        Look up an analysis, first in memory and then in MongoDB.
+
+        Args:
+            key (str): Analysis cache key.
+
+        Returns:
+            dict | None: The cached analysis, or None on a miss.
+        """
+        analysis = self.memory.get(key)
+        if analysis is not None:
+            metrics.increment(f"{self.name}.hit")
+            metrics.increment(f"{self.name}.hit.memory")
+            return analysis
+
+        document = await self.collection.find_one({"_id": key}, {"analysis": 1})
+        if document is not None:
+            analysis = document["analysis"]
+            self.memory.set(key, analysis)
+            metrics.increment(f"{self.name}.hit")
+            metrics.increment(f"{self.name}.hit.mongo")
+            return analysis
+
+        metrics.increment(f"{self.name}.miss")
+        return None
+
+    async def set(self, key, analysis, model, prompt_version):
+        """
+        Store an analysis in both tiers.
+
+        Args:
+            key (str): Analysis cache key.
+            analysis (dict): Parsed LLM analysis.
+            model (str): Gemini model name that produced the analysis.
+            prompt_version (str): Prompt version that produced the analysis.
+        """
+        self.memory.set(key, analysis)
+        await self.collection.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "analysis": analysis,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "created_at": datetime.datetime.utcnow(),
+                }
+            },
+            upsert=True,
+        )
+
+    def stats(self):
+        """
+        Get hit/miss statistics for the cache.
+
+        Returns:
+            dict: Hit and miss counts, hit ratio and in-memory size.
+        """
+        hits = metrics.get_counter(f"{self.name}.hit")
+        misses = metrics.get_counter(f"{self.name}.miss")
+        total = hits + misses
+        return {
+            "hits": hits,
+            "memory_hits": metrics.get_counter(f"{self.name}.hit.memory"),
+            "mongo_hits": metrics.get_counter(f"{self.name}.hit.mongo"),
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_maxsize": self.memory.maxsize,
+        }
@@ -0,0 +1,80 @@
+import zlib
+
+from bson import Binary
+
+# Codecs for stored texts. A compressed text is stored as BSON binary next to
+# a "codec" field naming the codec; plain strings have no codec field.
+TEXT_CODECS = ("none", "zlib", "zstd")
+
+
+def _zstd():
+    # zstandard is optional; only needed to write or read zstd texts
+    import zstandard
+
+    return zstandard
+
+
+def check_codec(codec):
+    """
+    Fail fast if a text codec is unknown or its library is missing.
+
+    Args:
+        codec (str): Codec name.
+
+    Raises:
+        ValueError: If the codec cannot be used.
+    """
+    if codec not in TEXT_CODECS:
+        raise ValueError(f"Unknown TEXT_COMPRESSION {codec!r}; choose one of {', '.join(TEXT_CODECS)}.")
+    if codec == "zstd":
+        try:
+            _zstd()
+        except ImportError as e:
+            raise ValueError(f"TEXT_COMPRESSION 'zstd' needs the zstandard package: {e}")
+
+
+def compress_text(text, codec, min_bytes=0):
+    """
+    Encode a text for storage.
+
+    Args:
+        text (str): Text to store.
+        codec (str): One of TEXT_CODECS.
+        min_bytes (int): Texts smaller than this are stored as plain strings.
+
+    Returns:
+        tuple: (value, codec) where value is the string itself with codec None,
+        or the compressed bytes as BSON binary with the codec used.
+    """
+    data = text.encode("utf-8")
+    if codec == "none" or len(data) < min_bytes:
+        return text, None
+    if codec == "zlib":
+        compressed = zlib.compress(data)
+    else:
+        compressed = _zstd().ZstdCompressor().compress(data)
+    if len(compressed) >= len(data):
+        return text, None
+    return Binary(compressed), codec
+
+
+def decompress_text(value, codec):
+    """
+    Decode a text written by compress_text().
+
+    Args:
+        value (str | bytes): Stored value.
+        codec (str | None): Stored codec marker, None for plain strings.
+
+    Returns:
+        str: The original text.
+    """
+    if codec is None:
+        return value
+    if codec == "zlib":
+        data = zlib.decompress(value)
+    elif codec == "zstd":
+        data = _zstd().ZstdDecompressor().decompress(value)
+    else:
+        raise ValueError(f"Unknown text codec {codec!r}")
+    return data.decode("utf-8")
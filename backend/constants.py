@@ -9,4 +9,104 @@ MONGO_DB = os.getenv("MONGO_DB")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # MongoDB connection string
-MONGO_URI = f"mongodb://{MONGO_HOST}:{MONGO_PORT}"
\ No newline at end of file
+MONGO_URI = f"mongodb://{MONGO_HOST}:{MONGO_PORT}"
+
+# Shared MongoDB client: connections per worker, how long idle connections are
+# kept, and how long to wait for a server before failing a request. Wire
+# compression (e.g. "zstd,zlib"; zstd needs pymongo[zstd]) pays off
+# when MongoDB runs on another host; empty disables it.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+
+# "production" makes startup fail if required MongoDB indexes cannot be created
+# or SECRET_KEY is not set
+APP_ENV = os.getenv("APP_ENV", "development").lower()
+
+# Key signing the JWTs issued by /auth/login. Without it a random key is used
+# per process, so tokens do not survive a restart or work across workers.
+SECRET_KEY = os.getenv("SECRET_KEY", "")
+
+# Gemini model used for resume analysis
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+# Maximum number of concurrent Gemini calls per worker
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+
+# Ask Gemini for schema-constrained JSON instead of free text
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "true").lower() == "true"
+
+# "two_stage" parses each resume once (cached by resume hash) and then scores it
+# per JD; "single" does both in one Gemini call
+ANALYSIS_PIPELINE = os.getenv("ANALYSIS_PIPELINE", "two_stage")
+
+# Analysis cache settings
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "3600"))
+
+# get_analysis: in-memory budget and lifetime of cached stored records, and
+# how long clients may reuse a response before revalidating it with its ETag
+# (0 by default, as re-thresholding changes stored records)
+ANALYSIS_RECORD_CACHE_BYTES = int(os.getenv("ANALYSIS_RECORD_CACHE_BYTES", str(32 * 1024 * 1024)))
+ANALYSIS_RECORD_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_RECORD_CACHE_TTL_SECONDS", "300"))
+ANALYSIS_HTTP_MAX_AGE = int(os.getenv("ANALYSIS_HTTP_MAX_AGE", "0"))
+
+# Batch analysis settings
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Local skill-overlap pre-screen that skips Gemini for clearly off-target resumes.
+# Pairs scoring below min(PRESCREEN_CUTOFF, recommended_store / 2) are marked
+# "not recommended"; PRESCREEN_SHADOW_RATE of them still go to Gemini to
+# measure pre-screen precision.
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+PRESCREEN_CUTOFF = int(os.getenv("PRESCREEN_CUTOFF", "15"))
+PRESCREEN_SHADOW_RATE = float(os.getenv("PRESCREEN_SHADOW_RATE", "0.02"))
+
+# PDF text extraction: worker processes (0 = use a thread instead), per-document
+# timeout, and the page and character budgets per document. Pages past
+# PDF_MAX_PAGES are never decoded. Documents longer than PDF_PAGES_PER_TASK
+# pages are split into page ranges extracted in parallel, at most
+# PDF_POOL_SIZE at a time; once PDF_MAX_CHARS is reached no further range is
+# started, so up to PDF_POOL_SIZE - 1 ranges may be decoded past it.
+PDF_POOL_SIZE = int(os.getenv("PDF_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "100000"))
+PDF_PAGES_PER_TASK = max(1, int(os.getenv("PDF_PAGES_PER_TASK", "8")))
+
+# PDF extraction backend: pypdf2 (default), pypdf, pdfminer (pdfminer.six) or
+# pypdfium2. Only PyPDF2 is in requirements.txt; install the others to use them.
+# Compare them with: python -m benchmarks.bench_pdf_extract
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf2").lower()
+
+# Clean extracted text before prompting: collapse whitespace, rejoin hyphenated
+# words, drop page numbers and headers/footers repeated at the top or bottom
+# (TEXT_NORMALIZE_EDGE_LINES lines) of at least TEXT_NORMALIZE_REPEAT_RATIO of pages
+TEXT_NORMALIZE_ENABLED = os.getenv("TEXT_NORMALIZE_ENABLED", "true").lower() == "true"
+TEXT_NORMALIZE_REPEAT_RATIO = float(os.getenv("TEXT_NORMALIZE_REPEAT_RATIO", "0.5"))
+TEXT_NORMALIZE_EDGE_LINES = int(os.getenv("TEXT_NORMALIZE_EDGE_LINES", "3"))
+
+# Upload limits: UPLOAD_MAX_BYTES per file (checked while hashing the file
+# Starlette spooled when parsing the form). Request bodies are checked from
+# Content-Length before parsing: /upload_resume and its stream variant carry two
+# files plus MULTIPART_OVERHEAD_BYTES, /batch up to BATCH_REQUEST_MAX_BYTES and
+# every other endpoint up to REQUEST_MAX_BYTES.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+MULTIPART_OVERHEAD_BYTES = int(os.getenv("MULTIPART_OVERHEAD_BYTES", str(64 * 1024)))
+BATCH_REQUEST_MAX_BYTES = int(os.getenv("BATCH_REQUEST_MAX_BYTES", str(100 * 1024 * 1024)))
+REQUEST_MAX_BYTES = int(os.getenv("REQUEST_MAX_BYTES", str(1024 * 1024)))
+
+# Compression of stored texts (documents and extracted-text cache): "zlib",
+# "zstd" (needs the zstandard package) or "none". Texts under
+# TEXT_COMPRESSION_MIN_BYTES are stored as plain strings. Existing texts are
+# converted with: python -m scripts.compress_texts
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib").lower()
+TEXT_COMPRESSION_MIN_BYTES = int(os.getenv("TEXT_COMPRESSION_MIN_BYTES", "1024"))
+
+# In-memory budget for the extracted-text cache (persistent copies live in MongoDB)
+TEXT_CACHE_MAX_BYTES = int(os.getenv("TEXT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
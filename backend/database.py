@@ -0,0 +1,149 @@
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+import constants
+import metrics
+
+# The one MongoDB client of this worker, created at app startup. Every router
+# gets its collections from it, so they share a single connection pool.
+mongo_client = None
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Count pool connections and time checkouts. Events arrive on the driver's
+    threads; metrics is thread-safe.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        metrics.increment("mongo.pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        metrics.increment("mongo.connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        metrics.increment("mongo.connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        metrics.increment("mongo.checkout_failed")
+        metrics.observe("mongo.checkout_latency", event.duration)
+
+    def connection_checked_out(self, event):
+        metrics.increment("mongo.checked_out")
+        metrics.observe("mongo.checkout_latency", event.duration)
+
+    def connection_checked_in(self, event):
+        metrics.increment("mongo.checked_in")
+
+
+def client_options():
+    """
+    Build the MongoClient keyword arguments from the MONGO_* settings.
+
+    Returns:
+        dict: Pool, timeout and compression options.
+    """
+    options = {
+        "maxPoolSize": constants.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": constants.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": constants.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": constants.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": constants.MONGO_CONNECT_TIMEOUT_MS,
+        "event_listeners": [PoolMetricsListener()],
+    }
+    if constants.MONGO_COMPRESSORS:
+        options["compressors"] = constants.MONGO_COMPRESSORS
+    return options
+
+
+def init_database():
+    """
+    Create the shared MongoDB client.
+
+    Connections are opened lazily by the driver, so this does not block on an
+    unreachable server; use ping_database() to check connectivity.
+
+    Returns:
+        AsyncIOMotorDatabase: The application database.
+    """
+    global mongo_client
+    if mongo_client is None:
+        mongo_client = AsyncIOMotorClient(constants.MONGO_URI, **client_options())
+    return mongo_client[constants.MONGO_DB]
+
+
+def close_database():
+    """
+    Close the shared MongoDB client and its connection pool.
+    """
+    global mongo_client
+    if mongo_client is not None:
+        mongo_client.close()
+    mongo_client = None
+
+
+def get_database():
+    """
+    Get the application database from the shared client. Usable as a FastAPI
+    dependency.
+
+    Raises:
+        RuntimeError: If init_database() has not been called.
+
+    Returns:
+        AsyncIOMotorDatabase: The application database.
+    """
+    if mongo_client is None:
+        raise RuntimeError("MongoDB client is not initialized; call init_database() first.")
+    return mongo_client[constants.MONGO_DB]
+
+
+async def ping_database():
+    """
+    Round-trip a ping to MongoDB.
+
+    Raises:
+        PyMongoError: If the server cannot be reached within the
+            server-selection timeout.
+
+    Returns:
+        float: Ping latency in seconds.
+    """
+    start = time.perf_counter()
+    await get_database().command("ping")
+    latency = time.perf_counter() - start
+    metrics.observe("mongo.ping_latency", latency)
+    return latency
+
+
+def pool_stats():
+    """
+    Get connection counts of this worker's pool.
+
+    Returns:
+        dict: Connections currently open and checked out, and failed checkouts.
+    """
+    return {
+        "max_pool_size": constants.MONGO_MAX_POOL_SIZE,
+        "open_connections": metrics.get_counter("mongo.connections_created")
+        - metrics.get_counter("mongo.connections_closed"),
+        "checked_out": metrics.get_counter("mongo.checked_out") - metrics.get_counter("mongo.checked_in"),
+        "checkout_failed": metrics.get_counter("mongo.checkout_failed"),
+    }
@@ -0,0 +1,94 @@
+import datetime
+import hashlib
+
+from pymongo import UpdateOne
+
+import metrics
+from compression import compress_text, decompress_text
+
+
+def text_hash(text):
+    """
+    Hash a document text for content-addressed storage.
+
+    Args:
+        text (str): Document text.
+
+    Returns:
+        str: Hex SHA-256 digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """
+    Content-addressed store of resume and job description texts. Each distinct
+    text is stored once under its SHA-256; analyses reference it by hash, so a
+    JD reused across many candidates is not copied into every record. Large
+    texts are compressed with the configured codec and decompressed on read.
+    """
+
+    def __init__(self, collection, codec="none", min_bytes=0):
+        """
+        Args:
+            collection: Motor collection holding {"_id": hash, "text": ...} documents.
+            codec (str): Codec for new texts, one of compression.TEXT_CODECS.
+            min_bytes (int): Texts smaller than this are stored uncompressed.
+        """
+        self.collection = collection
+        self.codec = codec
+        self.min_bytes = min_bytes
+
+    def _encode(self, text, now):
+        value, codec = compress_text(text, self.codec, self.min_bytes)
+        document = {"text": value, "chars": len(text), "created_at": now}
+        if codec is not None:
+            document["codec"] = codec
+        return document
+
+    async def put_many(self, texts):
+        """
+        Store texts that are not stored yet.
+
+        Args:
+            texts (Iterable[str]): Texts to store; duplicates are written once.
+
+        Returns:
+            list: The hash of each text, in the order given.
+        """
+        texts = list(texts)
+        hashes = [text_hash(text) for text in texts]
+        unique = dict(zip(hashes, texts))
+        now = datetime.datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": digest},
+                {"$setOnInsert": self._encode(text, now)},
+                upsert=True,
+            )
+            for digest, text in unique.items()
+        ]
+        if operations:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            metrics.increment("documents.inserted", result.upserted_count)
+            metrics.increment("documents.deduplicated", len(texts) - result.upserted_count)
+        return hashes
+
+    async def get_many(self, hashes):
+        """
+        Load texts by hash.
+
+        Args:
+            hashes (Iterable[str]): Text hashes.
+
+        Returns:
+            dict: Text per hash; unknown hashes are left out.
+        """
+        hashes = list(set(hashes))
+        if not hashes:
+            return {}
+        cursor = self.collection.find({"_id": {"$in": hashes}}, {"text": 1, "codec": 1})
+        return {
+            document["_id"]: decompress_text(document["text"], document.get("codec"))
+            async for document in cursor
+        }
@@ -0,0 +1,290 @@
+import logging
+
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+import metrics
+from analytics import role_evaluations, role_key
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDED = "recommended"
+NOT_RECOMMENDED = "not recommended"
+
+# Fields returned for each ranked evaluation
+RANK_PROJECTION = {
+    "_id": 1,
+    "file_id": 1,
+    "role": 1,
+    "score": 1,
+    "status": 1,
+    "candidateName": 1,
+    "filename": 1,
+    "batch_id": 1,
+    "created_at": 1,
+}
+
+
+def _status_at(score, threshold):
+    # Status at a recommendation threshold, as the prompts define it
+    return {"$cond": [{"$gte": [score, threshold]}, RECOMMENDED, NOT_RECOMMENDED]}
+
+
+def _is_recommended(status):
+    # summarize_analysis() compares case-insensitively
+    return {"$eq": [
+        {"$toLower": {"$cond": [{"$eq": [{"$type": status}, "string"]}, status, ""]}},
+        RECOMMENDED,
+    ]}
+
+
+def threshold_update(threshold):
+    """
+    Update pipeline for resume_analysis records that sets every scored role
+    evaluation's status for a new threshold, recounts summary.recommended_count,
+    stores the threshold and bumps the revision. Runs entirely in MongoDB, so
+    no record is transferred.
+
+    Args:
+        threshold (int): New recommendation threshold.
+
+    Returns:
+        list: Pipeline for update_one()/update_many(); match only records whose
+        analysis.evaluations is an array.
+    """
+    role = {"$map": {
+        "input": {"$objectToArray": "$$item"},
+        "as": "role",
+        "in": {
+            "k": "$$role.k",
+            "v": {"$cond": [
+                {"$and": [{"$eq": [{"$type": "$$role.v"}, "object"]}, {"$isNumber": "$$role.v.score"}]},
+                {"$mergeObjects": ["$$role.v", {"status": _status_at("$$role.v.score", threshold)}]},
+                "$$role.v",
+            ]},
+        },
+    }}
+    evaluations = {"$map": {
+        "input": "$analysis.evaluations",
+        "as": "item",
+        "in": {"$cond": [{"$eq": [{"$type": "$$item"}, "object"]}, {"$arrayToObject": role}, "$$item"]},
+    }}
+    recommended_count = {"$sum": {"$map": {
+        "input": "$analysis.evaluations",
+        "as": "item",
+        "in": {"$cond": [
+            {"$eq": [{"$type": "$$item"}, "object"]},
+            {"$size": {"$filter": {
+                "input": {"$objectToArray": "$$item"},
+                "as": "role",
+                "cond": _is_recommended("$$role.v.status"),
+            }}},
+            0,
+        ]},
+    }}}
+    return [
+        {"$set": {
+            "analysis.evaluations": evaluations,
+            "recommended_store": threshold,
+            "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]},
+        }},
+        {"$set": {"summary.recommended_count": recommended_count}},
+    ]
+
+
+def evaluation_rows(record):
+    """
+    Flatten an analysis record's [{"<role>": {...}}] evaluations into one
+    indexable document per role.
+
+    Args:
+        record (dict): Stored analysis record (see build_analysis_record).
+
+    Returns:
+        list: {file_id, jd_hash, role, role_key, score, status, ...} documents.
+        Empty if the record has no job_description_hash (legacy records with
+        embedded texts) or no scored evaluation.
+    """
+    if not record.get("job_description_hash"):
+        return []
+    analysis = record.get("analysis") or {}
+    return [
+        {
+            "file_id": record["file_id"],
+            "jd_hash": record["job_description_hash"],
+            "role": role,
+            "role_key": role_key(role),
+            "score": score,
+            "status": RECOMMENDED if recommended else NOT_RECOMMENDED,
+            "candidateName": analysis.get("candidateName"),
+            "filename": record.get("filename"),
+            "batch_id": record.get("batch_id"),
+            "username": record.get("username"),
+            "created_at": record.get("created_at"),
+        }
+        for role, score, recommended, _ in role_evaluations(analysis)
+    ]
+
+
+class EvaluationStore:
+    """
+    Role evaluations of stored analyses in a normalized form: one document per
+    (file_id, role) with the JD hash, score and status as plain fields. The
+    evaluations embedded in resume_analysis use the role as a key and cannot
+    be indexed; these can, so a user's top-K per JD is served from
+    (username, jd_hash, [role_key,] score, _id) indexes.
+    """
+
+    def __init__(self, collection):
+        """
+        Args:
+            collection: Motor collection holding the evaluation documents.
+        """
+        self.collection = collection
+
+    async def add(self, records):
+        """
+        Store the evaluations of newly inserted analysis records. Failures are
+        logged, not raised: the analyses are already stored and
+        scripts/backfill_evaluations.py restores missing rows.
+
+        Args:
+            records (Iterable[dict]): Analysis records that were just stored.
+        """
+        rows = [row for record in records for row in evaluation_rows(record)]
+        if not rows:
+            return
+        try:
+            await self.collection.insert_many(rows, ordered=False)
+        except BulkWriteError as e:
+            # Rows already present (unique file_id + role_key) are fine
+            errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+            if errors:
+                logger.error("%d evaluation row(s) not stored: %s", len(errors), errors[0].get("errmsg"))
+                metrics.increment("evaluations.insert_failed", len(errors))
+            metrics.increment("evaluations.inserted", e.details.get("nInserted", 0))
+            return
+        except PyMongoError as e:
+            logger.error("%d evaluation row(s) not stored: %s", len(rows), e)
+            metrics.increment("evaluations.insert_failed", len(rows))
+            return
+        metrics.increment("evaluations.inserted", len(rows))
+
+    async def backfill(self, records):
+        """
+        Upsert the evaluation rows of existing records, leaving rows that are
+        already stored untouched.
+
+        Args:
+            records (Iterable[dict]): Stored analysis records.
+
+        Returns:
+            int: Number of rows inserted.
+        """
+        operations = [
+            UpdateOne(
+                {"file_id": row["file_id"], "role_key": row["role_key"]},
+                {"$setOnInsert": row},
+                upsert=True,
+            )
+            for record in records
+            for row in evaluation_rows(record)
+        ]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.upserted_count
+
+    async def threshold_changes(self, query, threshold):
+        """
+        Count, per role, the rows whose status a new threshold would change.
+
+        Args:
+            query (dict): Rows to consider, e.g. {"jd_hash": ...}.
+            threshold (int): New recommendation threshold.
+
+        Returns:
+            dict: {role_key: (newly recommended, no longer recommended)} for
+            roles with changes.
+        """
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": "$role_key",
+                "promoted": {"$sum": {"$cond": [
+                    {"$and": [{"$gte": ["$score", threshold]}, {"$ne": ["$status", RECOMMENDED]}]}, 1, 0,
+                ]}},
+                "demoted": {"$sum": {"$cond": [
+                    {"$and": [{"$lt": ["$score", threshold]}, {"$eq": ["$status", RECOMMENDED]}]}, 1, 0,
+                ]}},
+            }},
+        ]
+        return {
+            group["_id"]: (group["promoted"], group["demoted"])
+            async for group in self.collection.aggregate(pipeline)
+            if group["promoted"] or group["demoted"]
+        }
+
+    async def apply_threshold(self, query, threshold):
+        """
+        Set the status of rows for a new threshold with two update_many calls.
+
+        Args:
+            query (dict): Rows to update, e.g. {"jd_hash": ...}.
+            threshold (int): New recommendation threshold.
+
+        Returns:
+            int: Number of rows whose status changed.
+        """
+        result = await self.collection.bulk_write([
+            UpdateMany(
+                {**query, "score": {"$gte": threshold}, "status": {"$ne": RECOMMENDED}},
+                {"$set": {"status": RECOMMENDED}},
+            ),
+            UpdateMany(
+                {**query, "score": {"$lt": threshold}, "status": {"$ne": NOT_RECOMMENDED}},
+                {"$set": {"status": NOT_RECOMMENDED}},
+            ),
+        ], ordered=False)
+        return result.modified_count
+
+    async def top(self, username, jd_hash, limit, role=None, min_score=None, max_score=None, status=None, after=None):
+        """
+        Get a user's highest scored evaluations against a job description.
+
+        Args:
+            username (str): Only evaluations of this user's analyses.
+            jd_hash (str): job_description_hash of the JD.
+            limit (int): Maximum number of evaluations.
+            role (str | None): Only evaluations for this role (case-insensitive).
+            min_score (int | None): Only scores >= min_score.
+            max_score (int | None): Only scores <= max_score.
+            status (str | None): Only this status.
+            after (tuple | None): (score, _id) of the last evaluation of the
+                previous page.
+
+        Returns:
+            list: Evaluation documents ordered by score, then _id, descending.
+        """
+        query = {"username": username, "jd_hash": jd_hash}
+        if role is not None:
+            query["role_key"] = role_key(role)
+        score = {}
+        if min_score is not None:
+            score["$gte"] = min_score
+        if max_score is not None:
+            score["$lte"] = max_score
+        if score:
+            query["score"] = score
+        if status is not None:
+            query["status"] = status
+        if after is not None:
+            last_score, last_id = after
+            query["$or"] = [
+                {"score": {"$lt": last_score}},
+                {"score": last_score, "_id": {"$lt": last_id}},
+            ]
+        return await self.collection.find(query, RANK_PROJECTION) \
+            .sort([("score", -1), ("_id", -1)]) \
+            .limit(limit) \
+            .to_list(limit)
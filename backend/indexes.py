@@ -0,0 +1,116 @@
+import logging
+import time
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+import constants
+
+logger = logging.getLogger(__name__)
+
+# Indexes the queries rely on, by collection: (name, keys, options).
+# create_index() is a no-op when an identical index already exists.
+REQUIRED_INDEXES = {
+    "resume_analysis": [
+        # get_analysis looks records up by file_id
+        ("file_id_unique", [("file_id", ASCENDING)], {"unique": True}),
+        # Listing the records of one /batch upload
+        (
+            "batch_id_file_id",
+            [("batch_id", ASCENDING), ("file_id", ASCENDING)],
+            {"partialFilterExpression": {"batch_id": {"$exists": True}}},
+        ),
+        # Re-thresholding every analysis against one JD
+        ("job_description_hash", [("job_description_hash", ASCENDING)], {}),
+        # /history keyset pagination, newest first
+        (
+            "username_created_at",
+            [("username", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            {},
+        ),
+    ],
+    "evaluations": [
+        # One row per analysis and role; lets backfills upsert idempotently
+        ("file_id_role_key", [("file_id", ASCENDING), ("role_key", ASCENDING)], {"unique": True}),
+        # /rank top-K of a user's candidates per JD, across roles or for one role
+        (
+            "username_jd_hash_score",
+            [("username", ASCENDING), ("jd_hash", ASCENDING), ("score", DESCENDING), ("_id", DESCENDING)],
+            {},
+        ),
+        (
+            "username_jd_hash_role_key_score",
+            [
+                ("username", ASCENDING),
+                ("jd_hash", ASCENDING),
+                ("role_key", ASCENDING),
+                ("score", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            {},
+        ),
+    ],
+    "Users": [
+        # get_user_by_username on every login and registration
+        ("username_unique", [("username", ASCENDING)], {"unique": True}),
+    ],
+}
+
+
+class IndexBootstrapError(RuntimeError):
+    """Raised in production when a required index could not be created."""
+
+
+async def ensure_indexes(database):
+    """
+    Create the indexes in REQUIRED_INDEXES and check that they exist.
+
+    Safe to run on every startup. Failures (e.g. duplicate usernames blocking a
+    unique index, or an index with the same name but other options) are
+    logged; with APP_ENV=production they abort startup instead.
+
+    Args:
+        database: Motor database holding the collections.
+
+    Returns:
+        dict: Status per "<collection>.<index>": "ready", "failed" or "missing".
+
+    Raises:
+        IndexBootstrapError: In production, if any required index is not ready.
+    """
+    status = {}
+    problems = []
+    for collection_name, specs in REQUIRED_INDEXES.items():
+        collection = database[collection_name]
+        for name, keys, options in specs:
+            label = f"{collection_name}.{name}"
+            start = time.perf_counter()
+            try:
+                await collection.create_index(keys, name=name, **options)
+            except ConnectionFailure as e:
+                # No point trying the other indexes against an unreachable server
+                logger.error("Index bootstrap stopped, MongoDB is unreachable: %s", e)
+                problems.append(f"MongoDB unreachable: {e}")
+                return _finish(status, problems)
+            except PyMongoError as e:
+                logger.error("Index %s could not be created: %s", label, e)
+                status[label] = "failed"
+                problems.append(f"{label}: {e}")
+                continue
+            logger.info("Index %s ready (%.3fs)", label, time.perf_counter() - start)
+            status[label] = "ready"
+
+        existing = await collection.index_information()
+        for name, _, _ in specs:
+            label = f"{collection_name}.{name}"
+            if name not in existing and status.get(label) == "ready":
+                logger.error("Index %s is missing after creation", label)
+                status[label] = "missing"
+                problems.append(f"{label}: missing")
+    return _finish(status, problems)
+
+
+def _finish(status, problems):
+    if problems and constants.APP_ENV == "production":
+        raise IndexBootstrapError("Required MongoDB indexes are not ready: " + "; ".join(problems))
+    return status
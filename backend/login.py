@@ -7,7 +7,7 @@ import time
 from io import BytesIO
 from tempfile import NamedTemporaryFile
 from passlib.context import CryptContext
-from jose import jwt
+from jose import JWTError, jwt
 import uvicorn
 from fastapi import (
     Depends,
@@ -23,23 +23,53 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
-from motor.motor_asyncio import AsyncIOMotorClient
-from constants import  MONGO_URI, MONGO_DB
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 import base64
+import logging
+import secrets
+
+import constants
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[MONGO_DB]
-user_collection = db["Users"]
+# Bound to the shared MongoDB client by bind_database() at startup
+user_collection = None
 
-SECRET_KEY = "your_secret_key"
+SECRET_KEY = constants.SECRET_KEY or secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 blacklisted_tokens = set()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Reads the "Authorization: Bearer <token>" header issued by /auth/login
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+def check_secret_key():
+    """
+    Make sure JWTs are signed with a configured key.
+
+    Raises:
+        RuntimeError: With APP_ENV=production, if SECRET_KEY is not set.
+    """
+    if constants.SECRET_KEY:
+        return
+    if constants.APP_ENV == "production":
+        raise RuntimeError("SECRET_KEY must be set in production.")
+    logger.warning("SECRET_KEY is not set; using a random key, tokens end with this process.")
+
+def bind_database(database):
+    """
+    Point this router's collections at the shared database.
+
+    Args:
+        database: Motor database from database.init_database().
+    """
+    global user_collection
+    user_collection = database["Users"]
+
 class User(BaseModel):
     """
     Pydantic model for user registration.
@@ -74,6 +104,70 @@ def create_jwt_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_jwt_username(token: str):
+    """
+    Get the username from a JWT token issued by create_jwt_token().
+
+    Args:
+        token (str): Encoded JWT token.
+
+    Returns:
+        str or None: The username, or None if the token is invalid, expired
+        or blacklisted.
+    """
+    if token in blacklisted_tokens:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+async def get_optional_user(token: str = Depends(oauth2_scheme)):
+    """
+    Dependency returning the authenticated username, or None for anonymous requests.
+
+    Args:
+        token (str): Bearer token from the Authorization header, if any.
+
+    Returns:
+        str or None: The username.
+
+    Raises:
+        HTTPException: 401 if a token was sent but is not valid.
+    """
+    if token is None:
+        return None
+    username = decode_jwt_username(token)
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
+async def get_current_user(username: str = Depends(get_optional_user)):
+    """
+    Dependency requiring an authenticated user.
+
+    Args:
+        username (str): Username from get_optional_user.
+
+    Returns:
+        str: The username.
+
+    Raises:
+        HTTPException: 401 if the request is not authenticated.
+    """
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
 async def create_user(user: User):
     """
     Register a user into MongoDB.
@@ -84,7 +178,7 @@ async def create_user(user: User):
     Returns:
         dict: Success message.
     """
-    user_dict = user.dict()
+    user_dict = user.dict(exclude={"confirm_password"})
     await user_collection.insert_one(user_dict)
     return {"message": "User Saved successfully!"}
 
@@ -98,13 +192,31 @@ async def get_user_by_username(username: str):
     Returns:
         dict or None: User document.
     """
-    user = await db.Users.find_one({"username": username})
-    print(user)
+    user = await user_collection.find_one({"username": username})
     if user:
         user["_id"] = str(user["_id"])  # To avoid JSON serialization error
         return user
     return None
 
+def verify_password(password, hashed):
+    """
+    Check a password against its stored bcrypt hash.
+
+    Args:
+        password (str): Password sent by the user.
+        hashed (str): Stored hash.
+
+    Returns:
+        bool: True if they match; False for missing or malformed hashes (e.g.
+        the truncated hashes stored by earlier versions).
+    """
+    if not hashed:
+        return False
+    try:
+        return pwd_context.verify(password, hashed)
+    except ValueError:
+        return False
+
 @router.post("/register")
 async def register_user(user: User):
     """
@@ -129,8 +241,15 @@ async def register_user(user: User):
             detail="Username already exists",
         )
  
-    user.password = pwd_context.hash(user.password)[:32]
-    await create_user(user)
+    user.password = pwd_context.hash(user.password)
+    try:
+        await create_user(user)
+    except DuplicateKeyError:
+        # A concurrent registration took the name (username_unique index)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already exists",
+        )
     return {"message": "User registered successfully"}
 
 @router.post("/login")
@@ -144,7 +263,7 @@ async def login_user(user: userLogin):
         dict: JWT token or error message.
     """
     db_user = await get_user_by_username(user.username)
-    if not db_user:
+    if not db_user or not verify_password(user.password, db_user.get("password")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
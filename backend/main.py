@@ -1,10 +1,77 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from fastapi import Depends
-from login import router as login_router
-from resume_analyzer import router as resume_router
-app = FastAPI()
+from pymongo.errors import PyMongoError
+from login import bind_database as bind_login_database, check_secret_key, router as login_router
+from resume_analyzer import bind_database as bind_resume_database, router as resume_router
+from database import close_database, init_database, ping_database, pool_stats
+from indexes import ensure_indexes
+from pdf_extract import init_extraction_pool, shutdown_extraction_pool
+from utils import close_gemini_client, init_gemini_client
+from compression import check_codec
+from constants import (
+    BATCH_REQUEST_MAX_BYTES,
+    MULTIPART_OVERHEAD_BYTES,
+    REQUEST_MAX_BYTES,
+    TEXT_COMPRESSION,
+    UPLOAD_MAX_BYTES,
+)
+import metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create shared clients at startup and release them on shutdown.
+    """
+    check_codec(TEXT_COMPRESSION)
+    check_secret_key()
+    db = init_database()
+    bind_login_database(db)
+    bind_resume_database(db)
+    await ensure_indexes(db)
+    init_gemini_client()
+    init_extraction_pool()
+    yield
+    shutdown_extraction_pool()
+    await close_gemini_client()
+    close_database()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Largest request body of each upload endpoint; other endpoints get REQUEST_MAX_BYTES
+UPLOAD_REQUEST_LIMITS = {
+    "/resume/upload_resume": 2 * UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/resume/upload_resume/stream": 2 * UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/resume/batch": BATCH_REQUEST_MAX_BYTES,
+}
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """
+    Reject oversized bodies with 413 before the multipart form is parsed, using
+    the limit of the endpoint (see UPLOAD_REQUEST_LIMITS).
+
+    Starlette spools the whole form before the endpoint runs, so uploads
+    without a Content-Length (chunked) cannot be bounded and get 411.
+    """
+    limit = UPLOAD_REQUEST_LIMITS.get(request.url.path, REQUEST_MAX_BYTES)
+    content_length = request.headers.get("content-length")
+    if content_length is None and request.method == "POST" and request.url.path in UPLOAD_REQUEST_LIMITS:
+        return JSONResponse(status_code=411, content={"detail": "Uploads must send a Content-Length."})
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        metrics.increment("upload.rejected_too_large")
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body is larger than the limit of {limit} bytes."},
+        )
+    return await call_next(request)
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,4 +82,28 @@ app.add_middleware(
 )
 
 app.include_router(login_router, prefix="/auth", tags=["auth"])
-app.include_router(resume_router, prefix="/resume", tags=["resume"])
\ No newline at end of file
+app.include_router(resume_router, prefix="/resume", tags=["resume"])
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Report process-wide counters and timings (cache hits, LLM latency, ...).
+    """
+    return metrics.snapshot()
+
+
+@app.get("/health")
+async def health():
+    """
+    Ping MongoDB and report this worker's connection pool; 503 if the database
+    cannot be reached within the server-selection timeout.
+    """
+    try:
+        latency = await ping_database()
+    except PyMongoError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "mongo": {"ok": False, "error": str(e), **pool_stats()}},
+        )
+    return {"status": "ok", "mongo": {"ok": True, "ping_ms": round(latency * 1000, 2), **pool_stats()}}
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Process-wide counters and timings reported by the /metrics endpoint
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+
+def increment(name, amount=1):
+    """
+    Increment a named counter.
+
+    Args:
+        name (str): Counter name, e.g. "analysis_cache.hit".
+        amount (int): Value to add to the counter.
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name, value):
+    """
+    Record a single observation (usually a duration in seconds) for a named timing.
+
+    Args:
+        name (str): Timing name, e.g. "gemini.latency".
+        value (float): Observed value.
+    """
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            _timings[name] = {"count": 1, "total": value, "max": value}
+        else:
+            timing["count"] += 1
+            timing["total"] += value
+            timing["max"] = max(timing["max"], value)
+
+
+@contextmanager
+def timer(name):
+    """
+    Context manager that observes the wall-clock time spent in its block.
+
+    Args:
+        name (str): Timing name to record under.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def get_counter(name):
+    """
+    Get the current value of a counter.
+
+    Args:
+        name (str): Counter name.
+
+    Returns:
+        int: Current counter value (0 if never incremented).
+    """
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot():
+    """
+    Get a JSON-serializable copy of all counters and timings.
+
+    Returns:
+        dict: {"counters": {...}, "timings": {name: {count, total, avg, max}}}
+    """
+    with _lock:
+        timings = {
+            name: {
+                "count": t["count"],
+                "total": round(t["total"], 6),
+                "avg": round(t["total"] / t["count"], 6),
+                "max": round(t["max"], 6),
+            }
+            for name, t in _timings.items()
+        }
+        return {"counters": dict(_counters), "timings": timings}
@@ -0,0 +1,398 @@
+import asyncio
+import importlib
+import io
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader
+
+import constants
+import metrics
+from text_normalize import normalize_pages
+
+# Worker processes for CPU-bound PDF text extraction, created at app startup
+extraction_pool = None
+
+# Bump when extraction output changes (for any backend) so cached texts are re-extracted
+EXTRACTION_VERSION = "1"
+
+# Bump when text_normalize output changes
+TEXT_NORMALIZE_VERSION = "2"
+
+
+def extraction_cache_version():
+    """
+    Get the version stamped on cached extracted texts.
+
+    Includes the backend and the settings that change extraction output.
+
+    Returns:
+        str: Extraction cache version.
+    """
+    version = (
+        f"{constants.PDF_BACKEND}-{EXTRACTION_VERSION}"
+        f":pages={constants.PDF_MAX_PAGES}:chars={constants.PDF_MAX_CHARS}"
+    )
+    if constants.TEXT_NORMALIZE_ENABLED:
+        version += (
+            f":norm={TEXT_NORMALIZE_VERSION}"
+            f"/{constants.TEXT_NORMALIZE_REPEAT_RATIO}/{constants.TEXT_NORMALIZE_EDGE_LINES}"
+        )
+    return version
+
+
+class PdfExtractionError(Exception):
+    """Raised when a PDF cannot be extracted (invalid file or timeout)."""
+
+
+def init_extraction_pool():
+    """
+    Create the extraction process pool.
+
+    With PDF_POOL_SIZE=0 no processes are started and extraction runs in the
+    event loop's default thread pool instead.
+
+    Raises:
+        ValueError: If PDF_BACKEND is unknown or not installed.
+
+    Returns:
+        ProcessPoolExecutor | None: The shared pool.
+    """
+    global extraction_pool
+    check_backend(constants.PDF_BACKEND)
+    if extraction_pool is None and constants.PDF_POOL_SIZE > 0:
+        extraction_pool = ProcessPoolExecutor(max_workers=constants.PDF_POOL_SIZE)
+    return extraction_pool
+
+
+def shutdown_extraction_pool():
+    """
+    Stop the extraction process pool, cancelling queued work.
+    """
+    global extraction_pool
+    if extraction_pool is not None:
+        extraction_pool.shutdown(wait=False, cancel_futures=True)
+    extraction_pool = None
+
+
+def recycle_extraction_pool(pool):
+    """
+    Replace a pool whose worker is stuck or dead, terminating its workers.
+
+    A timed-out extraction keeps its worker parsing until it finishes, and
+    ProcessPoolExecutor cannot cancel a running call, so the pool is replaced.
+    Other work still running in it fails with BrokenProcessPool and is retried
+    by extract_pdf_text(). Does nothing if the pool was already replaced, or
+    for the thread pool used with PDF_POOL_SIZE=0.
+
+    Args:
+        pool (ProcessPoolExecutor | None): The pool the extraction ran in.
+    """
+    global extraction_pool
+    if pool is None or pool is not extraction_pool:
+        return
+    extraction_pool = None
+    # No public API stops a busy worker; _processes maps pids to the workers
+    workers = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for worker in workers:
+        worker.terminate()
+    metrics.increment("pdf.extract.pool_recycled")
+    init_extraction_pool()
+
+
+# Each backend opens a PDF and returns (page_count, page_text) where
+# page_text(index) decodes a single page, so pages are only parsed on demand.
+
+
+def _open_pypdf2(pdf_bytes):
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return len(reader.pages), lambda index: reader.pages[index].extract_text()
+
+
+def _open_pypdf(pdf_bytes):
+    from pypdf import PdfReader as PypdfReader
+
+    reader = PypdfReader(io.BytesIO(pdf_bytes))
+    return len(reader.pages), lambda index: reader.pages[index].extract_text()
+
+
+def _open_pdfminer(pdf_bytes):
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    pages = list(PDFPage.get_pages(io.BytesIO(pdf_bytes)))
+    manager = PDFResourceManager()
+
+    def page_text(index):
+        output = io.StringIO()
+        device = TextConverter(manager, output, laparams=LAParams())
+        PDFPageInterpreter(manager, device).process_page(pages[index])
+        device.close()
+        # TextConverter ends every page with a form feed
+        return output.getvalue().rstrip("\f")
+
+    return len(pages), page_text
+
+
+def _open_pypdfium2(pdf_bytes):
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(pdf_bytes)
+
+    def page_text(index):
+        page = document[index]
+        text_page = page.get_textpage()
+        try:
+            return text_page.get_text_range()
+        finally:
+            text_page.close()
+            page.close()
+
+    return len(document), page_text
+
+
+# Extraction backends selectable with PDF_BACKEND. Only PyPDF2 is a hard
+# dependency; the others are imported on first use.
+EXTRACTION_BACKENDS = {
+    "pypdf2": _open_pypdf2,
+    "pypdf": _open_pypdf,
+    "pdfminer": _open_pdfminer,
+    "pypdfium2": _open_pypdfium2,
+}
+
+# Module each backend needs, used to check availability up front
+BACKEND_MODULES = {
+    "pypdf2": "PyPDF2",
+    "pypdf": "pypdf",
+    "pdfminer": "pdfminer.high_level",
+    "pypdfium2": "pypdfium2",
+}
+
+
+def available_backends():
+    """
+    List the extraction backends whose libraries are installed.
+
+    Returns:
+        list: Backend names usable as PDF_BACKEND.
+    """
+    available = []
+    for name, module in BACKEND_MODULES.items():
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def check_backend(backend):
+    """
+    Fail fast if a backend is unknown or its library is missing.
+
+    Args:
+        backend (str): Backend name.
+
+    Raises:
+        ValueError: If the backend cannot be used.
+    """
+    if backend not in EXTRACTION_BACKENDS:
+        raise ValueError(
+            f"Unknown PDF_BACKEND {backend!r}; choose one of {', '.join(EXTRACTION_BACKENDS)}."
+        )
+    try:
+        importlib.import_module(BACKEND_MODULES[backend])
+    except ImportError as e:
+        raise ValueError(f"PDF_BACKEND {backend!r} is not installed: {e}")
+
+
+def extract_pages(pdf_bytes, start, stop, max_chars, backend="pypdf2"):
+    """
+    Extract the text of a range of pages. Runs inside a pool worker.
+
+    Pages are decoded one at a time and extraction stops once max_chars
+    characters have been collected, so later pages are never parsed.
+
+    Args:
+        pdf_bytes (bytes): The PDF file contents.
+        start (int): Index of the first page to extract.
+        stop (int): Index after the last page to extract.
+        max_chars (int): Character budget for the range.
+        backend (str): Name of the extraction backend.
+
+    Returns:
+        tuple: (pages, page_count) with the text of each extracted page and
+        the total number of pages in the document.
+    """
+    page_count, page_text = EXTRACTION_BACKENDS[backend](pdf_bytes)
+    pages = []
+    chars = 0
+    for index in range(start, min(stop, page_count)):
+        text = page_text(index) or ""
+        pages.append(text)
+        chars += len(text)
+        if chars >= max_chars:
+            break
+    return pages, page_count
+
+
+async def _extract_within_budget(pdf_bytes, pool):
+    loop = asyncio.get_running_loop()
+    chunk_size = constants.PDF_PAGES_PER_TASK
+    max_chars = constants.PDF_MAX_CHARS
+
+    def run(start, stop, budget):
+        return loop.run_in_executor(
+            pool, extract_pages, pdf_bytes, start, stop, budget, constants.PDF_BACKEND
+        )
+
+    # The first range also tells us how many pages the document has
+    pages, page_count = await run(0, min(chunk_size, constants.PDF_MAX_PAGES), max_chars)
+    chars = sum(len(text) for text in pages)
+    stop = min(page_count, constants.PDF_MAX_PAGES)
+    starts = iter(range(chunk_size, stop, chunk_size))
+
+    # The remaining ranges run in parallel, at most one per worker at a time.
+    # Results are taken in page order and no range starts once the budget is
+    # reached, so at most window - 1 ranges are decoded past the budget
+    window = max(1, constants.PDF_POOL_SIZE)
+    in_flight = deque()
+
+    def start_next():
+        start = next(starts, None)
+        if start is not None:
+            in_flight.append(run(start, min(start + chunk_size, stop), max_chars - chars))
+
+    if chars < max_chars:
+        for _ in range(window):
+            start_next()
+    try:
+        while in_flight:
+            chunk_pages, _ = await in_flight.popleft()
+            pages.extend(chunk_pages)
+            chars += sum(len(text) for text in chunk_pages)
+            if chars >= max_chars:
+                break
+            start_next()
+    finally:
+        # Ranges not started yet are dropped; running ones finish unused
+        for future in in_flight:
+            future.cancel()
+    return pages, page_count
+
+
+def _apply_char_budget(pages, max_chars):
+    """Keep pages in order until max_chars, cutting the page that crosses it."""
+    kept = []
+    chars = 0
+    for text in pages:
+        if chars + len(text) > max_chars:
+            if chars < max_chars:
+                kept.append(text[: max_chars - chars])
+            return kept, True
+        kept.append(text)
+        chars += len(text)
+    return kept, False
+
+
+async def extract_pdf_text(pdf_bytes):
+    """
+    Extract a PDF's text off the event loop, bounded by the configured timeout
+    and by the PDF_MAX_PAGES / PDF_MAX_CHARS budgets.
+
+    Documents longer than PDF_PAGES_PER_TASK pages are split into page ranges
+    extracted in parallel by the pool workers, up to PDF_MAX_PAGES; ranges are
+    consumed in page order and stop being started once PDF_MAX_CHARS is
+    reached. With TEXT_NORMALIZE_ENABLED the pages are then cleaned by
+    text_normalize.normalize_pages() in the pool.
+
+    Args:
+        pdf_bytes (bytes): The PDF file contents.
+
+    Returns:
+        tuple: (text, info) where info holds the pages processed and skipped,
+        whether the text was truncated, the text size before and after
+        normalization and the extraction time in seconds.
+
+    Raises:
+        PdfExtractionError: If the PDF cannot be read or extraction times out.
+            On timeout the process pool is recycled so the worker does not
+            keep parsing.
+    """
+    start = time.perf_counter()
+    pool = init_extraction_pool()
+    try:
+        try:
+            pages, page_count = await asyncio.wait_for(
+                _extract_within_budget(pdf_bytes, pool), timeout=constants.PDF_EXTRACT_TIMEOUT_SECONDS
+            )
+        except BrokenProcessPool:
+            # Recycled after another extraction timed out, or a worker died
+            recycle_extraction_pool(pool)
+            pool = init_extraction_pool()
+            pages, page_count = await asyncio.wait_for(
+                _extract_within_budget(pdf_bytes, pool), timeout=constants.PDF_EXTRACT_TIMEOUT_SECONDS
+            )
+    except asyncio.TimeoutError:
+        metrics.increment("pdf.extract.timeout")
+        # Stop the worker still parsing this PDF
+        recycle_extraction_pool(pool)
+        raise PdfExtractionError(
+            f"PDF extraction timed out after {constants.PDF_EXTRACT_TIMEOUT_SECONDS} seconds."
+        )
+    except Exception as e:
+        metrics.increment("pdf.extract.failed")
+        raise PdfExtractionError(f"Could not extract text from PDF: {e}")
+    seconds = time.perf_counter() - start
+    metrics.observe("pdf.extract.latency", seconds)
+
+    pages, cut = _apply_char_budget(pages, constants.PDF_MAX_CHARS)
+    skipped = page_count - len(pages)
+    if skipped or cut:
+        metrics.increment("pdf.extract.truncated")
+
+    # Join once instead of growing a string page by page
+    raw_text = "\n".join(pages) + "\n" if pages else ""
+    text = raw_text
+    if constants.TEXT_NORMALIZE_ENABLED and pages:
+        text = await normalize_text(pages)
+
+    return text, {
+        "pages": len(pages),
+        "total_pages": page_count,
+        "skipped_pages": skipped,
+        "truncated": bool(skipped or cut),
+        "raw_chars": len(raw_text),
+        "chars": len(text),
+        "seconds": round(seconds, 4),
+    }
+
+
+async def normalize_text(pages):
+    """
+    Normalize extracted pages in the extraction pool and record the savings.
+
+    Args:
+        pages (list): Text of each extracted page.
+
+    Returns:
+        str: The normalized text.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    text = await loop.run_in_executor(
+        init_extraction_pool(),
+        normalize_pages,
+        pages,
+        constants.TEXT_NORMALIZE_REPEAT_RATIO,
+        constants.TEXT_NORMALIZE_EDGE_LINES,
+    )
+    metrics.observe("text_normalize.latency", time.perf_counter() - start)
+    metrics.increment("text_normalize.chars_before", sum(len(page) + 1 for page in pages))
+    metrics.increment("text_normalize.chars_after", len(text))
+    return text
@@ -0,0 +1,301 @@
+import random
+import re
+import time
+from functools import lru_cache
+
+import metrics
+
+# Skill vocabulary used by the local pre-screen. Keys are canonical skill
+# names; values are extra spellings that map to them.
+SKILL_VOCABULARY = {
+    # Languages
+    "python": [], "java": [], "javascript": ["js", "ecmascript"], "typescript": [],
+    "c++": ["cpp"], "c#": ["csharp"], "golang": [], "rust": [], "ruby": [],
+    "php": [], "kotlin": [], "swift": [], "scala": [], "matlab": [], "perl": [],
+    "bash": ["shell scripting"], "powershell": [], "sql": [], "pl/sql": ["plsql"],
+    "dart": [], "objective-c": [], "haskell": [], "elixir": [], "lua": [], "groovy": [],
+    "solidity": [], "vba": [], "cobol": [], "fortran": [], "julia": [],
+    # Web and frameworks
+    "html": ["html5"], "css": ["css3"], "sass": ["scss"], "tailwind": ["tailwindcss"],
+    "bootstrap": [], "react": ["reactjs", "react.js"], "angular": ["angularjs"],
+    "vue": ["vuejs", "vue.js"], "svelte": [], "next.js": ["nextjs"], "nuxt": [],
+    "redux": [], "jquery": [], "node.js": ["nodejs"], "express.js": ["expressjs"],
+    "nestjs": [], "django": [], "flask": [], "fastapi": [], "spring boot": ["springboot", "spring framework"],
+    "hibernate": [], ".net": ["dotnet", "asp.net", ".net core"], "rails": ["ruby on rails"], "laravel": [],
+    "graphql": [], "rest api": ["restful", "rest apis", "restful apis"], "grpc": [], "soap": [],
+    "websockets": ["websocket"], "flutter": [], "react native": [], "android": [], "ios": [],
+    "xamarin": [], "electron": [], "webpack": [], "vite": [],
+    # Data stores
+    "mysql": [], "postgresql": ["postgres"], "sqlite": [], "oracle": [], "sql server": ["mssql"],
+    "mongodb": ["mongo"], "redis": [], "cassandra": [], "dynamodb": [], "elasticsearch": ["elastic search"],
+    "neo4j": [], "couchbase": [], "firebase": [], "snowflake": [], "bigquery": [], "redshift": [],
+    "hbase": [], "mariadb": [],
+    # Cloud and DevOps
+    "aws": ["amazon web services"], "azure": ["microsoft azure"], "gcp": ["google cloud", "google cloud platform"],
+    "docker": [], "kubernetes": ["k8s"], "terraform": [], "ansible": [], "puppet": [],
+    "jenkins": [], "gitlab ci": [], "github actions": [], "circleci": [], "ci/cd": ["cicd", "ci cd"],
+    "git": [], "linux": ["unix"], "nginx": [], "helm": [], "openshift": [],
+    "aws lambda": [], "ec2": [], "s3": [], "cloudformation": [], "prometheus": [],
+    "grafana": [], "datadog": [], "splunk": [], "microservices": ["microservice"], "serverless": [],
+    # Data, ML and AI
+    "machine learning": ["ml"], "deep learning": [], "nlp": ["natural language processing"],
+    "computer vision": [], "data analysis": ["data analytics"], "data science": [],
+    "statistics": [], "pandas": [], "numpy": [], "scipy": [], "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": [], "pytorch": ["torch"], "keras": [], "xgboost": [], "opencv": [],
+    "hugging face": ["huggingface", "transformers"], "llm": ["llms", "large language models"],
+    "generative ai": ["genai", "gen ai"], "langchain": [], "spark": ["pyspark", "apache spark"],
+    "hadoop": [], "kafka": ["apache kafka"], "airflow": ["apache airflow"], "etl": [], "dbt": [],
+    "tableau": [], "power bi": ["powerbi"], "microsoft excel": ["ms excel", "advanced excel"], "looker": [], "mlops": [],
+    "data engineering": [], "data modeling": ["data modelling"], "data warehousing": ["data warehouse"],
+    # Testing and practices
+    "selenium": [], "cypress": [], "jest": [], "pytest": [], "junit": [], "mocha": [],
+    "unit testing": [], "tdd": ["test driven development"], "agile": [], "scrum": [], "kanban": [],
+    "jira": [], "confluence": [], "devops": [], "sre": ["site reliability engineering"],
+    "oop": ["object oriented programming"], "design patterns": [], "system design": [],
+    "data structures": [], "algorithms": [], "security": ["cybersecurity", "cyber security"],
+    "oauth": [], "jwt": [], "networking": [], "tcp/ip": [],
+    # Design, product and business
+    "figma": [], "adobe xd": [], "photoshop": [], "illustrator": [], "ux": ["user experience"],
+    "ui": ["user interface"], "seo": [], "sap": [], "salesforce": [], "erp": [], "crm": [],
+    "product management": [], "project management": [], "business analysis": [],
+    "accounting": [], "financial analysis": [], "marketing": [], "sales": [],
+    # Soft skills
+    "communication": [], "leadership": [], "teamwork": [], "problem solving": [],
+    "stakeholder management": [], "mentoring": [],
+}
+
+# Precomputed lookup: every spelling (canonical or alias) -> canonical skill
+_SKILL_LOOKUP = {}
+for _skill, _aliases in SKILL_VOCABULARY.items():
+    _SKILL_LOOKUP[_skill] = _skill
+    for _alias in _aliases:
+        _SKILL_LOOKUP[_alias] = _skill
+
+# Longest skill spelling in words, so n-gram generation can stop there, and the
+# first words of multi-word spellings, so n-grams are only built where needed
+_MAX_NGRAM = max(len(spelling.split()) for spelling in _SKILL_LOOKUP)
+_MULTIWORD_PREFIXES = frozenset(
+    spelling.split()[0] for spelling in _SKILL_LOOKUP if " " in spelling
+)
+
+# Words may contain + # . / - (c++, c#, .net, node.js, ci/cd, scikit-learn).
+# Ambiguous everyday words ("go", "rest", "express") are kept out of the
+# vocabulary in favour of unambiguous spellings ("golang", "rest api").
+_TOKEN_RE = re.compile(r"[a-z0-9.][a-z0-9+#./-]*")
+_SPLIT_RE = re.compile(r"[/-]")
+
+
+@lru_cache(maxsize=512)
+def extract_skills(text):
+    """
+    Find vocabulary skills mentioned in a text.
+
+    The text is tokenized once and each token (plus the n-grams starting at
+    tokens that begin a multi-word skill) is looked up in the precomputed
+    spelling table, so the cost is linear in the text length.
+    Results are memoized because the same JD is screened against many resumes.
+
+    Args:
+        text (str): Resume or job description text.
+
+    Returns:
+        frozenset: Canonical names of the skills found.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".,")
+        if token in _SKILL_LOOKUP or not _SPLIT_RE.search(token):
+            tokens.append(token)
+        else:
+            # "python/django" or "python-based": look at the parts separately
+            tokens.extend(part for part in _SPLIT_RE.split(token) if part)
+    found = set()
+    for start, token in enumerate(tokens):
+        skill = _SKILL_LOOKUP.get(token)
+        if skill is not None:
+            found.add(skill)
+        if token not in _MULTIWORD_PREFIXES:
+            continue
+        for size in range(2, _MAX_NGRAM + 1):
+            if start + size > len(tokens):
+                break
+            skill = _SKILL_LOOKUP.get(" ".join(tokens[start:start + size]))
+            if skill is not None:
+                found.add(skill)
+    return frozenset(found)
+
+
+def score_overlap(resume_text, job_description_text):
+    """
+    Score how many of the JD's vocabulary skills appear in the resume.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+
+    Returns:
+        dict | None: score (0-100), matched and missing skills, or None when the
+        JD mentions no vocabulary skills and cannot be pre-screened.
+    """
+    jd_skills = extract_skills(job_description_text)
+    if not jd_skills:
+        return None
+    resume_skills = extract_skills(resume_text)
+    matched = sorted(jd_skills & resume_skills)
+    missing = sorted(jd_skills - resume_skills)
+    return {
+        "score": round(100 * len(matched) / len(jd_skills)),
+        "matched": matched,
+        "missing": missing,
+    }
+
+
+def effective_cutoff(recommended_store, cutoff):
+    """
+    Get the pre-screen cut-off for a request.
+
+    The cut-off never exceeds half of the recommendation threshold, so only
+    resumes far below the bar are rejected without the LLM.
+
+    Args:
+        recommended_store (int): Recommendation threshold of the request.
+        cutoff (int): Configured pre-screen cut-off.
+
+    Returns:
+        float: Overlap score below which a resume is pre-screened out.
+    """
+    return min(cutoff, recommended_store / 2)
+
+
+def build_prescreen_analysis(result, recommended_store):
+    """
+    Build the analysis stored for a pre-screened pair.
+
+    It is marked prescreened and carries the skill overlap under "prescreen"
+    rather than in role evaluations: the overlap is not comparable to LLM
+    scores, and the pre-screen knows neither the role nor the candidate.
+
+    Args:
+        result (dict): Output of score_overlap().
+        recommended_store (int): Recommendation threshold of the request.
+
+    Returns:
+        dict: Analysis without evaluations or LLM scores.
+    """
+    summary = (
+        f"Pre-screened without LLM analysis: the resume mentions {len(result['matched'])} of "
+        f"{len(result['matched']) + len(result['missing'])} skills required by the JD, "
+        f"far below the recommendation threshold of {recommended_store}."
+    )
+    return {
+        "prescreened": True,
+        "candidateName": None,
+        "overall_score": None,
+        "resume_styling_score": None,
+        "overall_summary": summary,
+        "evaluations": [],
+        "prescreen": {
+            "status": "not recommended",
+            "skill_overlap": result["score"],
+            "matchedSkills": ", ".join(result["matched"]),
+            "missing": ", ".join(result["missing"]),
+            "suggest": "Add experience with the JD's required skills to work experience or projects.",
+        },
+    }
+
+
+def prescreen(resume_text, job_description_text, recommended_store, cutoff):
+    """
+    Run the local pre-screen for a resume/JD pair.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold of the request.
+        cutoff (int): Configured pre-screen cut-off.
+
+    Returns:
+        dict | None: A pre-screened analysis if the resume is clearly off-target,
+        otherwise None (the pair should go to the LLM).
+    """
+    start = time.perf_counter()
+    try:
+        result = score_overlap(resume_text, job_description_text)
+    finally:
+        metrics.observe("prescreen.latency", time.perf_counter() - start)
+    metrics.increment("prescreen.evaluated")
+
+    if result is None:
+        metrics.increment("prescreen.no_jd_skills")
+        return None
+    if result["score"] >= effective_cutoff(recommended_store, cutoff):
+        metrics.increment("prescreen.passed")
+        return None
+
+    metrics.increment("prescreen.rejected")
+    return build_prescreen_analysis(result, recommended_store)
+
+
+def should_shadow(rate):
+    """
+    Decide whether a pre-screened pair should also be sent to the LLM.
+
+    Shadow samples measure pre-screen precision against the LLM's verdict.
+
+    Args:
+        rate (float): Fraction of rejected pairs to shadow (0 disables it).
+
+    Returns:
+        bool: True if this pair should be shadowed.
+    """
+    return rate > 0 and random.random() < rate
+
+
+def record_shadow_result(analysis):
+    """
+    Compare the LLM verdict for a pre-screened pair with the pre-screen's rejection.
+
+    Args:
+        analysis (dict): The LLM analysis for the pair.
+    """
+    statuses = [
+        str(details.get("status", "")).lower()
+        for evaluation in analysis.get("evaluations") or []
+        if isinstance(evaluation, dict)
+        for details in evaluation.values()
+        if isinstance(details, dict)
+    ]
+    if not statuses:
+        return
+    if "recommended" in statuses:
+        metrics.increment("prescreen.shadow_disagree")
+    else:
+        metrics.increment("prescreen.shadow_agree")
+
+
+def prescreen_stats():
+    """
+    Report pre-screen throughput and precision.
+
+    Precision is the share of shadowed rejections the LLM also rated
+    "not recommended" for every role.
+
+    Returns:
+        dict: Counts, rejection rate, screens per second and shadow precision.
+    """
+    evaluated = metrics.get_counter("prescreen.evaluated")
+    rejected = metrics.get_counter("prescreen.rejected")
+    agree = metrics.get_counter("prescreen.shadow_agree")
+    disagree = metrics.get_counter("prescreen.shadow_disagree")
+    latency = metrics.snapshot()["timings"].get("prescreen.latency")
+    return {
+        "evaluated": evaluated,
+        "rejected": rejected,
+        "passed": metrics.get_counter("prescreen.passed"),
+        "no_jd_skills": metrics.get_counter("prescreen.no_jd_skills"),
+        "rejection_rate": round(rejected / evaluated, 4) if evaluated else 0.0,
+        "avg_latency_seconds": latency["avg"] if latency else 0.0,
+        "screens_per_second": round(latency["count"] / latency["total"], 1) if latency and latency["total"] else 0.0,
+        "shadow_samples": agree + disagree,
+        "shadow_precision": round(agree / (agree + disagree), 4) if agree + disagree else None,
+    }
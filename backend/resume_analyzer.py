@@ -1,133 +1,1606 @@
 import base64
+import datetime
+import hashlib
 import io
 import mimetypes
 import uuid
-from typing import List
-from constants import MONGO_DB, MONGO_URI
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile, Form
+from typing import List, Optional
+from constants import (
+    ANALYSIS_CACHE_SIZE,
+    ANALYSIS_CACHE_TTL_SECONDS,
+    ANALYSIS_HTTP_MAX_AGE,
+    ANALYSIS_RECORD_CACHE_BYTES,
+    ANALYSIS_RECORD_CACHE_TTL_SECONDS,
+    ANALYSIS_PIPELINE,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    GEMINI_MODEL,
+    PRESCREEN_CUTOFF,
+    PRESCREEN_ENABLED,
+    PRESCREEN_SHADOW_RATE,
+    TEXT_CACHE_MAX_BYTES,
+    TEXT_COMPRESSION,
+    TEXT_COMPRESSION_MIN_BYTES,
+)
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, UploadFile, Form
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from motor.motor_asyncio import AsyncIOMotorClient
-from PyPDF2 import PdfReader
+from fastapi.responses import JSONResponse, Response
+from bson import ObjectId
 import json
 from fastapi.responses import StreamingResponse
 import asyncio
+import metrics
+from analytics import RoleSummaryStore, live_role_summary
+from cache import AnalysisCache, AnalysisRecordCache, TextExtractionCache, make_analysis_key, make_resume_key
+from documents import DocumentStore, text_hash
+from evaluations import NOT_RECOMMENDED, RECOMMENDED, EvaluationStore, threshold_update
+from login import get_current_user, get_optional_user
+from pdf_extract import PdfExtractionError, extract_pdf_text, extraction_cache_version
+from uploads import UploadTooLargeError, spool_upload
+from prescreen import prescreen, prescreen_stats, record_shadow_result, should_shadow
+from schemas import JobEvaluation, ResumeAnalysis, StructuredResume
+from singleflight import SingleFlight
 from utils import (
-    get_gemini_response,
+    EVALUATION_PROMPT_VERSION,
+    PROMPT_VERSION,
+    STRUCTURING_PROMPT_VERSION,
+    get_gemini_response_async,
+    get_gemini_response_stream,
     format_llm_output,
+    generate_evaluation_prompt,
     generate_prompt,
-    generate_prompt_new
+    generate_prompt_new,
+    generate_structuring_prompt,
+    llm_output_stats,
+    prompt_stats
 )
 
 # Initialize FastAPI app
 router = APIRouter()
 
-# Create async Mongo client
-client = AsyncIOMotorClient(MONGO_URI)
+# Collections, bound to the shared MongoDB client by bind_database() at startup
+files_collection = None
+files_data = None
+
+# Resume and JD texts stored once by SHA-256; analyses reference them by hash
+document_store = DocumentStore(
+    None,
+    codec=TEXT_COMPRESSION,
+    min_bytes=TEXT_COMPRESSION_MIN_BYTES,
+)
+
+# Stored analysis records by file_id for get_analysis (read-through)
+record_cache = AnalysisRecordCache(
+    ANALYSIS_RECORD_CACHE_BYTES,
+    ttl=ANALYSIS_RECORD_CACHE_TTL_SECONDS,
+)
+
+# Content-addressed cache of LLM analyses, persisted next to resume_analysis
+analysis_cache = AnalysisCache(
+    None,
+    maxsize=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL_SECONDS,
+)
+
+# Extracted PDF text keyed by SHA-256 of the uploaded bytes, so a JD uploaded
+# with every candidate is parsed once
+text_cache = TextExtractionCache(
+    None,
+    max_bytes=TEXT_CACHE_MAX_BYTES,
+    version=extraction_cache_version(),
+    codec=TEXT_COMPRESSION,
+    min_bytes=TEXT_COMPRESSION_MIN_BYTES,
+)
+
+# Structured resumes from the first stage of the two-stage pipeline, keyed by resume hash
+structured_resume_cache = AnalysisCache(
+    None,
+    maxsize=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL_SECONDS,
+    name="structured_resume_cache",
+)
+
+# Per-role score histograms and missing-skill counts, updated on every insert
+role_summaries = RoleSummaryStore(None)
+
+# Evaluations flattened to one indexable row per analysis and role, for /rank
+evaluation_store = EvaluationStore(None)
+
+def bind_database(database):
+    """
+    Point this router's collections and stores at the shared database.
+
+    Args:
+        database: Motor database from database.init_database().
+    """
+    global files_collection, files_data
+    files_collection = database["resume_analysis"]
+    files_data = database["resumes"]
+    document_store.collection = database["documents"]
+    analysis_cache.collection = database["analysis_cache"]
+    text_cache.collection = files_data
+    structured_resume_cache.collection = database["structured_resumes"]
+    role_summaries.collection = database["role_summaries"]
+    evaluation_store.collection = database["evaluations"]
+
+# Prompt version(s) that produce an analysis; part of the analysis cache key
+if ANALYSIS_PIPELINE == "two_stage":
+    ANALYSIS_VERSION = f"{STRUCTURING_PROMPT_VERSION}+{EVALUATION_PROMPT_VERSION}"
+else:
+    ANALYSIS_VERSION = PROMPT_VERSION
+
+# Coalesce identical concurrent requests: one for the LLM analysis, one for
+# callers that also want to share the stored record, and one for structuring
+# a resume that several JD evaluations are waiting on
+analysis_flights = SingleFlight("analysis")
+record_flights = SingleFlight("record")
+structure_flights = SingleFlight("structure")
+extraction_flights = SingleFlight("extraction")
+
+async def extract_document_text(document):
+    """
+    Get an uploaded PDF's text, parsing it only if the same bytes were never
+    extracted before. The cache is keyed by the digest computed while the
+    upload was spooled, so a cache hit never reads the file back.
+
+    Args:
+        document (SpooledUpload): The spooled PDF upload.
+
+    Returns:
+        tuple: (text, info) where info holds the pages processed and skipped,
+        extraction seconds and whether the text came from the cache.
+
+    Raises:
+        PdfExtractionError: If the PDF cannot be extracted.
+    """
+    entry = await text_cache.get(document.digest, document.size)
+    if entry is not None:
+        text, info = entry
+        return text, {**info, "cached": True}
+
+    async def extract_and_cache():
+        text, info = await extract_pdf_text(await document.read_bytes())
+        await text_cache.set(document.digest, text, info, document.size)
+        return text, info
 
-# Access the database
-db = client[MONGO_DB]
+    (text, info), _ = await extraction_flights.do(document.digest, extract_and_cache)
+    return text, {**info, "cached": False}
+
+
+async def receive_upload(upload):
+    """
+    Spool an uploaded file, enforcing the upload size limit.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+
+    Returns:
+        SpooledUpload: The spooled copy; the caller must close() it.
+
+    Raises:
+        HTTPException: 413 if the file is larger than UPLOAD_MAX_BYTES.
+    """
+    try:
+        return await spool_upload(upload)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def extract_upload_text(upload):
+    """
+    Read an uploaded PDF and extract its text.
+
+    Args:
+        upload (UploadFile): The uploaded PDF.
+
+    Returns:
+        tuple: (text, info) from extract_document_text().
+
+    Raises:
+        HTTPException: 413 if the PDF is too large, 422 if it cannot be extracted.
+    """
+    document = await receive_upload(upload)
+    try:
+        return await extract_document_text(document)
+    except PdfExtractionError as e:
+        raise HTTPException(status_code=422, detail=f"{upload.filename}: {e}")
+    finally:
+        await document.close()
+
+
+def record_prompt_stats(prompt, prompt_version):
+    """
+    Measure a prompt and record its size per prompt version.
+
+    Args:
+        prompt (str): The generated prompt.
+        prompt_version (str): Version of the template that built the prompt.
+
+    Returns:
+        dict: Output of prompt_stats().
+    """
+    stats = prompt_stats(prompt, prompt_version)
+    metrics.observe(f"prompt.{prompt_version}.chars", stats["chars"])
+    metrics.observe(f"prompt.{prompt_version}.tokens", stats["tokens"])
+    return stats
+
+
+def make_request_key(resume_text, job_description_text, recommended_store):
+    """
+    Build the analysis cache key for the configured pipeline.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+
+    Returns:
+        str: Content hash of the analysis inputs.
+    """
+    return make_analysis_key(
+        resume_text, job_description_text, recommended_store, GEMINI_MODEL, ANALYSIS_VERSION
+    )
+
+
+def is_cacheable_analysis(analysis):
+    """
+    Check whether a formatted LLM output parsed cleanly and may be cached.
+
+    Args:
+        analysis (dict): Output of format_llm_output().
+
+    Returns:
+        bool: True if the analysis is a parsed report rather than a fallback.
+    """
+    return "raw_response" not in analysis and "error" not in analysis
+
+
+async def structure_resume_uncached(resume_text, resume_key):
+    """
+    Run the resume structuring stage and cache its output by resume hash.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        resume_key (str): Output of make_resume_key() for the resume.
+
+    Returns:
+        dict: Structured resume, or a raw_response/error fallback.
+    """
+    prompt = generate_structuring_prompt(resume_text)
+    record_prompt_stats(prompt, STRUCTURING_PROMPT_VERSION)
+    gemini_response = await get_gemini_response_async(prompt, StructuredResume)
+    structured = format_llm_output(gemini_response)
+    if is_cacheable_analysis(structured):
+        await structured_resume_cache.set(
+            resume_key, structured, GEMINI_MODEL, STRUCTURING_PROMPT_VERSION
+        )
+    return structured
+
+
+async def get_structured_resume(resume_text):
+    """
+    Get the structured form of a resume, parsing it with Gemini only the first time.
+
+    Args:
+        resume_text (str): Extracted resume text.
+
+    Returns:
+        dict: Structured resume, or a raw_response/error fallback.
+    """
+    resume_key = make_resume_key(resume_text, GEMINI_MODEL, STRUCTURING_PROMPT_VERSION)
+    structured = await structured_resume_cache.get(resume_key)
+    if structured is None:
+        structured, _ = await structure_flights.do(
+            resume_key, lambda: structure_resume_uncached(resume_text, resume_key)
+        )
+    return structured
+
+
+async def prepare_analysis_call(resume_text, job_description_text, recommended_store):
+    """
+    Build the Gemini call that produces the analysis for the configured pipeline.
+
+    In the two-stage pipeline the resume is structured first (cached by resume
+    hash) and the returned prompt only evaluates it against the JD.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+
+    Returns:
+        tuple: (prompt, stats, response_schema, structured) where structured is the
+        structured resume to merge into the result, or None for the single-call
+        pipeline. prompt is None if the structuring stage failed, in which case
+        structured holds its fallback output.
+    """
+    if ANALYSIS_PIPELINE == "two_stage":
+        structured = await get_structured_resume(resume_text)
+        if not is_cacheable_analysis(structured):
+            return None, None, None, structured
+        prompt = generate_evaluation_prompt(structured, job_description_text, recommended_store)
+        stats = record_prompt_stats(prompt, EVALUATION_PROMPT_VERSION)
+        return prompt, stats, JobEvaluation, structured
+
+    # Generate prompt for Gemini LLM
+    #prompt = generate_prompt(resume_text, job_description_text, recommended_store)
+
+    prompt = generate_prompt_new(resume_text, job_description_text, recommended_store)
+    stats = record_prompt_stats(prompt, PROMPT_VERSION)
+    return prompt, stats, ResumeAnalysis, None
+
+
+def finish_analysis(formatted_output, structured):
+    """
+    Combine the evaluation output with the structured resume, if any.
+
+    Args:
+        formatted_output (dict): Formatted output of the analysis call.
+        structured (dict | None): Structured resume from the first stage.
+
+    Returns:
+        dict: The analysis in the shape the frontend expects.
+    """
+    if structured is None or not is_cacheable_analysis(formatted_output):
+        return formatted_output
+    return {**structured, **formatted_output}
+
+
+async def analyze_uncached(resume_text, job_description_text, recommended_store, analysis_key):
+    """
+    Run the Gemini analysis for inputs that are not in the cache, and cache the result.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        analysis_key (str): Content hash of the analysis inputs.
+
+    Returns:
+        dict: Formatted LLM output.
+    """
+    prompt, _, response_schema, structured = await prepare_analysis_call(
+        resume_text, job_description_text, recommended_store
+    )
+    if prompt is None:
+        return structured
+
+    # Get response from Gemini LLM
+    gemini_response = await get_gemini_response_async(prompt, response_schema)
+
+    # Format the LLM output
+    formatted_output = finish_analysis(format_llm_output(gemini_response), structured)
+
+    # Only cache analyses that parsed cleanly
+    if is_cacheable_analysis(formatted_output):
+        await analysis_cache.set(analysis_key, formatted_output, GEMINI_MODEL, ANALYSIS_VERSION)
+    return formatted_output
+
+
+async def stream_uncached(resume_text, job_description_text, recommended_store, analysis_key, emit):
+    """
+    analyze_uncached() with streaming: reports progress and the raw LLM text
+    through emit(event, payload) as they happen. Runs as the analysis flight,
+    so identical requests arriving meanwhile wait for its result; emit(None,
+    None) marks the end of the events, also on failure.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        analysis_key (str): Content hash of the analysis inputs.
+        emit (Callable[[str, dict], None]): Receives SSE events.
+
+    Returns:
+        dict: Formatted LLM output.
+    """
+    try:
+        if ANALYSIS_PIPELINE == "two_stage":
+            emit("progress", {"stage": "structure"})
+        prompt, stats, response_schema, structured = await prepare_analysis_call(
+            resume_text, job_description_text, recommended_store
+        )
+        if prompt is None:
+            return structured
+        emit("progress", {"stage": "prompt", **stats})
+
+        emit("progress", {"stage": "llm"})
+        chunks = []
+        async for chunk in get_gemini_response_stream(prompt, response_schema):
+            chunks.append(chunk)
+            emit("token", {"text": chunk})
+
+        emit("progress", {"stage": "parse"})
+        formatted_output = finish_analysis(format_llm_output("".join(chunks)), structured)
+        if is_cacheable_analysis(formatted_output):
+            await analysis_cache.set(analysis_key, formatted_output, GEMINI_MODEL, ANALYSIS_VERSION)
+        return formatted_output
+    finally:
+        emit(None, None)
+
+
+def run_prescreen(resume_text, job_description_text, recommended_store):
+    """
+    Run the local skill-overlap pre-screen before any LLM work.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+
+    Returns:
+        tuple: (analysis, shadowed). analysis is a pre-screened "not recommended"
+        analysis to return instead of calling Gemini, or None. shadowed is True
+        when the pair was rejected but sampled for the LLM to measure precision.
+    """
+    if not PRESCREEN_ENABLED:
+        return None, False
+    screened = prescreen(resume_text, job_description_text, recommended_store, PRESCREEN_CUTOFF)
+    if screened is None:
+        return None, False
+    if should_shadow(PRESCREEN_SHADOW_RATE):
+        metrics.increment("prescreen.shadowed")
+        return None, True
+    return screened, False
+
+
+async def get_or_create_analysis(resume_text, job_description_text, recommended_store, analysis_key):
+    """
+    Get an analysis from the pre-screen or the cache, or run it once for all
+    concurrent identical requests.
+
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        analysis_key (str): Content hash of the analysis inputs.
+
+    Returns:
+        tuple: (analysis, cached, coalesced)
+    """
+    screened, shadowed = run_prescreen(resume_text, job_description_text, recommended_store)
+    if screened is not None:
+        return screened, False, False
+
+    formatted_output = await analysis_cache.get(analysis_key)
+    cached = formatted_output is not None
+    coalesced = False
+    if not cached:
+        formatted_output, coalesced = await analysis_flights.do(
+            analysis_key,
+            lambda: analyze_uncached(resume_text, job_description_text, recommended_store, analysis_key),
+        )
+
+    if shadowed:
+        record_shadow_result(formatted_output)
+    return formatted_output, cached, coalesced
+
+
+def summarize_analysis(analysis):
+    """
+    Extract the fields shown in a user's history from an analysis.
+
+    Args:
+        analysis (dict): Formatted LLM output.
+
+    Returns:
+        dict: Candidate name, overall score, and the number of evaluated and
+        recommended roles.
+    """
+    roles = [
+        evaluation
+        for item in analysis.get("evaluations") or []
+        if isinstance(item, dict)
+        for evaluation in item.values()
+        if isinstance(evaluation, dict)
+    ]
+    return {
+        "candidateName": analysis.get("candidateName"),
+        "overall_score": analysis.get("overall_score"),
+        "evaluated_roles": len(roles),
+        "recommended_count": sum(
+            1 for evaluation in roles if str(evaluation.get("status", "")).lower() == "recommended"
+        ),
+    }
+
+
+def build_analysis_record(
+    filename,
+    content_type,
+    resume_text_hash,
+    job_description_hash,
+    recommended_store,
+    analysis_key,
+    analysis,
+    username=None
+):
+    """
+    Build the MongoDB document for an analysis.
+
+    The texts themselves live in the documents collection (see DocumentStore);
+    the record only references them by hash.
+
+    Args:
+        filename (str): Name of the uploaded resume file.
+        content_type (str): MIME type of the uploaded resume file.
+        resume_text_hash (str): Hash of the extracted resume text.
+        job_description_hash (str): Hash of the extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        analysis_key (str): Content hash of the analysis inputs.
+        analysis (dict): Formatted LLM output.
+        username (str | None): User who requested the analysis.
+
+    Returns:
+        dict: The record, including a newly generated file_id.
+    """
+    return {
+        "file_id": str(uuid.uuid4()),
+        "filename": filename,
+        "content_type": content_type,
+        "resume_text_hash": resume_text_hash,
+        "job_description_hash": job_description_hash,
+        "recommended_store": recommended_store,
+        "analysis_key": analysis_key,
+        "analysis": analysis,
+        "username": username,
+        "created_at": datetime.datetime.utcnow(),
+        "summary": summarize_analysis(analysis),
+        "prescreened": analysis.get("prescreened", False),
+    }
+
+
+async def store_analysis(
+    filename,
+    content_type,
+    resume_text,
+    job_description_text,
+    recommended_store,
+    analysis_key,
+    analysis,
+    username=None
+):
+    """
+    Store an analysis in MongoDB, storing its texts in the document store
+    unless they are already there.
+
+    Args:
+        filename (str): Name of the uploaded resume file.
+        content_type (str): MIME type of the uploaded resume file.
+        resume_text (str): Extracted resume text.
+        job_description_text (str): Extracted job description text.
+        recommended_store (int): Recommendation threshold.
+        analysis_key (str): Content hash of the analysis inputs.
+        analysis (dict): Formatted LLM output.
+        username (str | None): User who requested the analysis.
+
+    Returns:
+        str: The generated file_id of the stored record.
+    """
+    resume_text_hash, job_description_hash = await document_store.put_many(
+        [resume_text, job_description_text]
+    )
+    file_data = build_analysis_record(
+        filename,
+        content_type,
+        resume_text_hash,
+        job_description_hash,
+        recommended_store,
+        analysis_key,
+        analysis,
+        username,
+    )
+
+    # Insert data into MongoDB
+    await files_collection.insert_one(file_data)
+    await role_summaries.record([analysis])
+    await evaluation_store.add([file_data])
+    return file_data["file_id"]
+
+
+async def attach_texts(records):
+    """
+    Fill in resume_text and job_description on analysis records from the
+    document store. Records that still embed their texts are left as they are.
+
+    Args:
+        records (list): Analysis records; updated in place.
+    """
+    hashes = [
+        record.get(field)
+        for record in records
+        for field in ("resume_text_hash", "job_description_hash")
+        if record.get(field)
+    ]
+    texts = await document_store.get_many(hashes)
+    for record in records:
+        if "resume_text_hash" in record and "resume_text" not in record:
+            record["resume_text"] = texts.get(record["resume_text_hash"])
+        if "job_description_hash" in record and "job_description" not in record:
+            record["job_description"] = texts.get(record["job_description_hash"])
+
+
+def validate_pdf_uploads(resume_file, job_description):
+    """
+    Reject uploads that are not PDF files.
+
+    Args:
+        resume_file (UploadFile): The uploaded resume file.
+        job_description (UploadFile): The uploaded job description file.
+
+    Raises:
+        HTTPException: 400 if either file is not a PDF.
+    """
+    if resume_file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
+    if job_description.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Job description must be a PDF file.")
+
+
+def sse_event(event, data):
+    """
+    Format a Server-Sent Event.
+
+    Args:
+        event (str): Event name.
+        data (dict): JSON-serializable event payload.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-# Collection for resumes
-files_collection = db["resume_analysis"]
-files_data = db["resumes"]
 
 @router.post("/upload_resume")  
 async def upload_resume(
     request: Request,
     resume_file: UploadFile = File(...),
     job_description: UploadFile = File(...),
-    recommended_store: int = 70
+    recommended_store: int = 70,
+    share_record: bool = False,
+    username: Optional[str] = Depends(get_optional_user)
 ):
 
     """
     Upload a resume file, extract text, analyze it using Gemini LLM, and store the results in MongoDB.
 
+    Identical concurrent uploads are coalesced into a single Gemini call.
+
     Args:
         request (Request): The FastAPI request object.
         file (UploadFile): The uploaded resume file.
         job_description (str): The job description to compare against.
         recommended_store (str): The recommended store for resources.
+        share_record (bool): If True, identical concurrent uploads also share one
+            stored record and file_id instead of each storing their own.
+        username (str | None): Authenticated user, recorded on the analysis.
     Returns:
         JSONResponse: A response containing the analysis results or an error message.
     """
 
     try:
-        # Validate file type
-        if resume_file.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-
-        # Read and extract text from the PDF file
-        pdf_reader = PdfReader(resume_file.file)
-        resume_text = ""
-        for page in pdf_reader.pages:
-            resume_text += page.extract_text() + "\n"
-
-        # Read job description file
-        if job_description.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Job description must be a plain text file.")
-
-        jd_pdf_reader = PdfReader(job_description.file)
-        job_description_text = ""
-        for page in jd_pdf_reader.pages:
-            job_description_text += page.extract_text() + "\n"
-
-        # Generate prompt for Gemini LLM
-        #prompt = generate_prompt(resume_text, job_description_text, recommended_store)
-
-        prompt = generate_prompt_new(resume_text, job_description_text, recommended_store)
-
-        # Get response from Gemini LLM
-        gemini_response = get_gemini_response(prompt)
-
-        # Format the LLM output
-        formatted_output = format_llm_output(gemini_response)
-
-        # Prepare data to store in MongoDB
-        file_id = str(uuid.uuid4())
-        file_data = {
-            "file_id": file_id,
-            "filename": resume_file.filename,
-            "content_type": resume_file.content_type,
-            "resume_text": resume_text,
-            "job_description": job_description_text,
-            "recommended_store": recommended_store,
-            "analysis": formatted_output
-        }
+        # Validate file types
+        validate_pdf_uploads(resume_file, job_description)
+
+        # Read and extract text from the PDF files
+        (resume_text, resume_extraction), (job_description_text, jd_extraction) = await asyncio.gather(
+            extract_upload_text(resume_file),
+            extract_upload_text(job_description),
+        )
+
+        # Reuse a stored analysis when the same resume/JD/threshold was analyzed before
+        analysis_key = make_request_key(resume_text, job_description_text, recommended_store)
 
-        # Insert data into MongoDB
-        await files_collection.insert_one(file_data)
+        async def analyze_and_store():
+            analysis, was_cached, _ = await get_or_create_analysis(
+                resume_text, job_description_text, recommended_store, analysis_key
+            )
+            stored_file_id = await store_analysis(
+                resume_file.filename,
+                resume_file.content_type,
+                resume_text,
+                job_description_text,
+                recommended_store,
+                analysis_key,
+                analysis,
+                username,
+            )
+            return stored_file_id, analysis, was_cached
 
-        return JSONResponse(status_code=200, content={"message": "Resume analyzed and stored successfully.", "file_id": file_id, "analysis": formatted_output})
+        if share_record:
+            # Identical concurrent requests share one analysis and one stored record
+            (file_id, formatted_output, cached), coalesced = await record_flights.do(
+                f"{analysis_key}:{username}:{resume_file.filename}", analyze_and_store
+            )
+        else:
+            # Identical concurrent requests share the LLM call but get their own record
+            formatted_output, cached, coalesced = await get_or_create_analysis(
+                resume_text, job_description_text, recommended_store, analysis_key
+            )
+            file_id = await store_analysis(
+                resume_file.filename,
+                resume_file.content_type,
+                resume_text,
+                job_description_text,
+                recommended_store,
+                analysis_key,
+                formatted_output,
+                username,
+            )
 
+        return JSONResponse(status_code=200, content={"message": "Resume analyzed and stored successfully.", "file_id": file_id, "job_description_hash": text_hash(job_description_text), "recommended_store": recommended_store, "cached": cached, "coalesced": coalesced, "prescreened": formatted_output.get("prescreened", False), "extraction": {"resume": resume_extraction, "job_description": jd_extraction}, "analysis": formatted_output})
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/upload_resume/stream")
+async def upload_resume_stream(
+    request: Request,
+    resume_file: UploadFile = File(...),
+    job_description: UploadFile = File(...),
+    recommended_store: int = 70,
+    username: Optional[str] = Depends(get_optional_user)
+):
+    """
+    Analyze a resume like /upload_resume, streaming progress as Server-Sent Events.
+
+    Emits "progress" events for each stage (extract, prompt, llm, parse, store),
+    "token" events with the raw LLM text as it arrives, and a final "result"
+    event carrying the file_id and parsed analysis. Failures after the stream
+    has started are reported as an "error" event.
+
+    Args:
+        request (Request): The FastAPI request object.
+        resume_file (UploadFile): The uploaded resume file.
+        job_description (UploadFile): The uploaded job description file.
+        recommended_store (int): Recommendation threshold.
+        username (str | None): Authenticated user, recorded on the analysis.
+    Returns:
+        StreamingResponse: A text/event-stream response.
+    """
+    validate_pdf_uploads(resume_file, job_description)
+
+    # Spool the uploads now; they are closed once this handler returns
+    filename = resume_file.filename
+    content_type = resume_file.content_type
+    resume_document = await receive_upload(resume_file)
+    try:
+        job_description_document = await receive_upload(job_description)
+    except HTTPException:
+        await resume_document.close()
+        raise
+
+    async def events():
+        try:
+            yield sse_event("progress", {"stage": "extract"})
+            (resume_text, resume_extraction), (job_description_text, jd_extraction) = await asyncio.gather(
+                extract_document_text(resume_document),
+                extract_document_text(job_description_document),
+            )
+            yield sse_event("progress", {
+                "stage": "extracted",
+                "resume_chars": len(resume_text),
+                "job_description_chars": len(job_description_text),
+                "extraction": {"resume": resume_extraction, "job_description": jd_extraction},
+            })
+
+            analysis_key = make_request_key(resume_text, job_description_text, recommended_store)
+            screened, shadowed = run_prescreen(resume_text, job_description_text, recommended_store)
+            formatted_output = screened if screened is not None else await analysis_cache.get(analysis_key)
+            cached = screened is None and formatted_output is not None
+
+            if screened is not None:
+                yield sse_event("progress", {"stage": "prescreened"})
+            elif cached:
+                yield sse_event("progress", {"stage": "cache_hit"})
+            else:
+                # Run the streaming analysis as the analysis flight, so identical
+                # /upload_resume and /stream requests wait for it instead of
+                # calling Gemini again; if one is already running, join it
+                stream_events = asyncio.Queue()
+                task, coalesced = analysis_flights.join(
+                    analysis_key,
+                    lambda: stream_uncached(
+                        resume_text, job_description_text, recommended_store, analysis_key,
+                        lambda event, payload: stream_events.put_nowait((event, payload)),
+                    ),
+                )
+                if coalesced:
+                    yield sse_event("progress", {"stage": "coalesced"})
+                else:
+                    while True:
+                        event, payload = await stream_events.get()
+                        if event is None:
+                            break
+                        yield sse_event(event, payload)
+                formatted_output = await asyncio.shield(task)
+
+            if shadowed:
+                record_shadow_result(formatted_output)
+
+            yield sse_event("progress", {"stage": "store"})
+            file_id = await store_analysis(
+                filename,
+                content_type,
+                resume_text,
+                job_description_text,
+                recommended_store,
+                analysis_key,
+                formatted_output,
+                username,
+            )
+
+            yield sse_event("result", {
+                "message": "Resume analyzed and stored successfully.",
+                "file_id": file_id,
+                "job_description_hash": text_hash(job_description_text),
+                "recommended_store": recommended_store,
+                "cached": cached,
+                "prescreened": formatted_output.get("prescreened", False),
+                "analysis": formatted_output,
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            await resume_document.close()
+            await job_description_document.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/batch")
+async def upload_batch(
+    request: Request,
+    resume_files: List[UploadFile] = File(...),
+    job_descriptions: List[UploadFile] = File(...),
+    recommended_store: int = 70,
+    username: Optional[str] = Depends(get_optional_user)
+):
+    """
+    Analyze every uploaded resume against every uploaded job description.
+
+    Each document is extracted once, the resume x JD evaluations run with at
+    most BATCH_MAX_CONCURRENCY in flight, and all successful results are stored
+    with a single insert_many. A failing document or evaluation is reported on
+    its items without failing the rest of the batch.
+
+    Args:
+        request (Request): The FastAPI request object.
+        resume_files (List[UploadFile]): The uploaded resume PDFs.
+        job_descriptions (List[UploadFile]): The uploaded job description PDFs.
+        recommended_store (int): Recommendation threshold.
+        username (str | None): Authenticated user, recorded on the analyses.
+    Returns:
+        JSONResponse: The batch_id and one item per resume/JD pair with its
+        file_id, or its error.
+    """
+    total_items = len(resume_files) * len(job_descriptions)
+    if total_items > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {total_items} resume/JD pairs; the limit is {BATCH_MAX_ITEMS}.",
+        )
+
+    try:
+        batch_id = str(uuid.uuid4())
+
+        async def extract_upload(upload):
+            # Returns (text, error) so one bad document doesn't fail the batch
+            if upload.content_type != "application/pdf":
+                return None, "Only PDF files are supported."
+            try:
+                document = await spool_upload(upload)
+            except UploadTooLargeError as e:
+                return None, str(e)
+            try:
+                text, _ = await extract_document_text(document)
+                return text, None
+            except PdfExtractionError as e:
+                return None, str(e)
+            finally:
+                await document.close()
+
+        # Extract every document exactly once, in parallel across the pool
+        extracted = await asyncio.gather(*(
+            extract_upload(upload) for upload in [*resume_files, *job_descriptions]
+        ))
+        resumes = extracted[:len(resume_files)]
+        jds = extracted[len(resume_files):]
+
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def evaluate(resume_index, jd_index):
+            resume_upload = resume_files[resume_index]
+            jd_upload = job_descriptions[jd_index]
+            item = {
+                "resume": resume_upload.filename,
+                "job_description": jd_upload.filename,
+                "file_id": None,
+                "error": None,
+            }
+            resume_text, resume_error = resumes[resume_index]
+            jd_text, jd_error = jds[jd_index]
+            if resume_error or jd_error:
+                item["error"] = resume_error or jd_error
+                return item, None
+
+            analysis_key = make_request_key(resume_text, jd_text, recommended_store)
+            try:
+                async with semaphore:
+                    analysis, cached, _ = await get_or_create_analysis(
+                        resume_text, jd_text, recommended_store, analysis_key
+                    )
+            except Exception as e:
+                item["error"] = str(e)
+                return item, None
+
+            record = build_analysis_record(
+                resume_upload.filename,
+                resume_upload.content_type,
+                text_hash(resume_text),
+                text_hash(jd_text),
+                recommended_store,
+                analysis_key,
+                analysis,
+                username,
+            )
+            record["batch_id"] = batch_id
+            item["file_id"] = record["file_id"]
+            item["job_description_hash"] = record["job_description_hash"]
+            item["cached"] = cached
+            item["prescreened"] = analysis.get("prescreened", False)
+            return item, record
+
+        results = await asyncio.gather(*(
+            evaluate(resume_index, jd_index)
+            for resume_index in range(len(resume_files))
+            for jd_index in range(len(job_descriptions))
+        ))
+
+        items = [item for item, _ in results]
+        records = [record for _, record in results if record is not None]
+
+        # Store each distinct text once, then every successful analysis in one round trip
+        if records:
+            await document_store.put_many(text for text, _ in extracted if text is not None)
+            await files_collection.insert_many(records)
+            await role_summaries.record(record["analysis"] for record in records)
+            await evaluation_store.add(records)
+
+        failed = sum(1 for item in items if item["error"])
+        metrics.increment("batch.items", len(items))
+        metrics.increment("batch.failed", failed)
+
+        return JSONResponse(status_code=200, content={
+            "message": "Batch analyzed and stored.",
+            "batch_id": batch_id,
+            "total": len(items),
+            "succeeded": len(items) - failed,
+            "failed": failed,
+            "items": items,
+        })
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Fields returned by get_analysis unless others are asked for; what the
+# frontend's display_analysis_results reads
+DEFAULT_ANALYSIS_FIELDS = ("file_id", "filename", "analysis")
+
+# Top-level fields of a resume_analysis record that may be selected
+ANALYSIS_RECORD_FIELDS = {
+    "_id",
+    "file_id",
+    "filename",
+    "content_type",
+    "resume_text_hash",
+    "job_description_hash",
+    "recommended_store",
+    "analysis_key",
+    "analysis",
+    "batch_id",
+    "username",
+    "created_at",
+    "summary",
+    "prescreened",
+    "revision",
+}
+
+# Embedded texts of records not yet migrated by scripts/migrate_documents.py
+LEGACY_TEXT_FIELDS = ("resume_text", "job_description")
+
+
+def parse_field_selection(fields):
+    """
+    Validate get_analysis field selection.
+
+    Args:
+        fields (str | None): Comma-separated fields, dotted paths into them
+            (e.g. "analysis.evaluations"), or "all" for the whole record.
+            None selects DEFAULT_ANALYSIS_FIELDS.
+
+    Returns:
+        list | None: Selected field paths, or None for the whole record.
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested.
+    """
+    if fields == "all":
+        return None
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+    else:
+        selected = list(DEFAULT_ANALYSIS_FIELDS)
+    unknown = sorted({field for field in selected if field.split(".")[0] not in ANALYSIS_RECORD_FIELDS})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def select_fields(record, selected):
+    """
+    Apply a field selection to a record, like a MongoDB inclusion projection.
+
+    Args:
+        record (dict): Full analysis record.
+        selected (list | None): Field paths from parse_field_selection().
+
+    Returns:
+        dict: The selected fields; the record itself when selected is None.
+    """
+    if selected is None:
+        return record
+    result = {}
+    for path in selected:
+        source, target = record, result
+        *parents, leaf = path.split(".")
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return result
+
+
+async def load_analysis_record(file_id):
+    """
+    Get a stored analysis record through the in-process read-through cache.
+
+    Texts are not part of the cached record; see load_record_texts().
+
+    Args:
+        file_id (str): The record's file_id.
+
+    Returns:
+        dict | None: The JSON-ready record, or None if it does not exist.
+    """
+    record = record_cache.get(file_id)
+    if record is not None:
+        return record
+
+    record = await files_collection.find_one(
+        {"file_id": file_id}, {field: 0 for field in LEGACY_TEXT_FIELDS}
+    )
+    if record is None:
+        return None
+    record["_id"] = str(record["_id"])
+    if isinstance(record.get("created_at"), datetime.datetime):
+        record["created_at"] = record["created_at"].isoformat()
+    record_cache.set(file_id, record)
+    return record
+
+
+async def load_record_texts(record):
+    """
+    Load the resume and job description texts of a record.
+
+    Args:
+        record (dict): Record from load_analysis_record().
+
+    Returns:
+        dict: resume_text and job_description.
+    """
+    if "resume_text_hash" in record or "job_description_hash" in record:
+        texts = dict(record)
+        await attach_texts([texts])
+    else:
+        # Not yet migrated: the texts are still embedded in the record
+        texts = await files_collection.find_one(
+            {"file_id": record["file_id"]}, {field: 1 for field in LEGACY_TEXT_FIELDS}
+        ) or {}
+    return {field: texts.get(field) for field in LEGACY_TEXT_FIELDS}
+
+
+def invalidate_analysis_records(file_ids):
+    """
+    Drop modified or deleted records from the read-through cache. Call after
+    any write to existing resume_analysis records, and bump their "revision"
+    so clients holding an old ETag get the new version.
+
+    Args:
+        file_ids (Iterable[str]): file_ids of the changed records.
+    """
+    record_cache.invalidate(file_ids)
+
+
+def analysis_etag(record, fields, include_text):
+    """
+    Build the strong ETag of one representation of a record.
+
+    Args:
+        record (dict): Record from load_analysis_record().
+        fields (str | None): Requested field selection.
+        include_text (bool): Whether texts are included.
+
+    Returns:
+        str: Quoted ETag value.
+    """
+    version = f"{record['file_id']}:{record.get('revision', 0)}:{fields or ''}:{int(include_text)}"
+    return '"' + hashlib.sha256(version.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check an If-None-Match header against an ETag.
+
+    Args:
+        if_none_match (str | None): Header value.
+        etag (str): Current ETag.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @router.get("/get_analysis/{file_id}")
-async def get_analysis(file_id: str):
+async def get_analysis(
+    file_id: str,
+    request: Request,
+    fields: Optional[str] = None,
+    include_text: bool = False
+):
     """
     Retrieve the analysis results for a given resume file ID from MongoDB.
 
+    By default only file_id, filename and analysis are returned. Records are
+    served from an in-process read-through cache with a strong ETag; a
+    request whose If-None-Match matches gets a 304 without a body.
+
     Args:
         file_id (str): The unique identifier of the resume file.
+        request (Request): The FastAPI request object.
+        fields (str | None): Comma-separated fields to return, or "all" for
+            the whole record (e.g. for exports).
+        include_text (bool): Also return the extracted resume_text and
+            job_description, loaded from the document store.
     Returns:
         JSONResponse: A response containing the analysis results or an error message.
     """
     try:
-        # Fetch the document from MongoDB
-        file_data = await files_collection.find_one({"file_id": file_id})
+        selected = parse_field_selection(fields)
+        record = await load_analysis_record(file_id)
 
-        if not file_data:
+        if not record:
             raise HTTPException(status_code=404, detail="File not found.")
 
-        # Remove MongoDB's internal ID before returning
-        file_data["_id"] = str(file_data["_id"])
+        etag = analysis_etag(record, fields, include_text)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={ANALYSIS_HTTP_MAX_AGE}",
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            metrics.increment("record_cache.not_modified")
+            return Response(status_code=304, headers=headers)
+
+        file_data = select_fields(record, selected)
+        if include_text:
+            file_data = {**file_data, **await load_record_texts(record)}
+
+        response = JSONResponse(status_code=200, content=file_data, headers=headers)
+        metrics.observe("get_analysis.bytes", len(response.body))
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Fields returned per history entry
+HISTORY_PROJECTION = {
+    "_id": 1,
+    "file_id": 1,
+    "filename": 1,
+    "created_at": 1,
+    "recommended_store": 1,
+    "batch_id": 1,
+    "summary": 1,
+}
+
+
+def encode_history_cursor(record):
+    """
+    Encode the keyset position after a history entry.
+
+    Args:
+        record (dict): Last returned record, with created_at and _id.
+
+    Returns:
+        str: Opaque cursor for the next page.
+    """
+    position = {"created_at": record["created_at"].isoformat(), "_id": str(record["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def decode_history_cursor(cursor):
+    """
+    Decode a cursor from encode_history_cursor().
+
+    Args:
+        cursor (str): Opaque cursor.
+
+    Returns:
+        tuple: (created_at, _id) of the last entry already returned.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.datetime.fromisoformat(position["created_at"]), ObjectId(position["_id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@router.get("/history")
+async def get_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    username: str = Depends(get_current_user)
+):
+    """
+    List the authenticated user's analyses, newest first.
+
+    Uses keyset pagination on (username, created_at, _id) backed by the
+    username_created_at index, so every page costs the same however deep it
+    is. Only summary fields are returned; fetch a full analysis with
+    /get_analysis/{file_id}.
+
+    Args:
+        limit (int): Maximum number of entries per page.
+        cursor (str | None): next_cursor from the previous page.
+        username (str): Authenticated user.
+    Returns:
+        JSONResponse: The entries and next_cursor (None on the last page).
+    """
+    query = {"username": username}
+    if cursor:
+        created_at, last_id = decode_history_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+
+    try:
+        # One extra entry tells whether there is a next page
+        records = await files_collection.find(query, HISTORY_PROJECTION) \
+            .sort([("created_at", -1), ("_id", -1)]) \
+            .limit(limit + 1) \
+            .to_list(limit + 1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    next_cursor = encode_history_cursor(records[limit - 1]) if len(records) > limit else None
+    items = []
+    for record in records[:limit]:
+        record["_id"] = str(record["_id"])
+        record["created_at"] = record["created_at"].isoformat()
+        items.append(record)
+    return JSONResponse(status_code=200, content={"items": items, "next_cursor": next_cursor})
+
+
+async def rethreshold_analyses(record_query, row_query, threshold):
+    """
+    Recompute the status of stored role evaluations for a new recommendation
+    threshold from their stored scores, without calling the LLM. Pre-screened
+    analyses are left alone.
+
+    The records are updated by one server-side update pipeline, the evaluation
+    rows by two update_many calls, and the role summaries' recommended counts
+    by the resulting per-role changes.
+
+    Args:
+        record_query (dict): resume_analysis records to update.
+        row_query (dict): The same analyses' rows in the evaluations collection.
+        threshold (int): New recommendation threshold.
+
+    Returns:
+        dict: Analyses updated, evaluation rows whose status changed, and per
+        role the number newly recommended and no longer recommended.
+    """
+    # Pre-screened analyses have no LLM scores to re-threshold
+    record_query = {**record_query, "analysis.evaluations": {"$type": "array"}, "analysis.prescreened": {"$ne": True}}
+    with metrics.timer("rethreshold.latency"):
+        file_ids = [record["file_id"] async for record in files_collection.find(record_query, {"file_id": 1})]
+        if not file_ids:
+            return {"analyses": 0, "evaluations_changed": 0, "roles": {}}
+        changes = await evaluation_store.threshold_changes(row_query, threshold)
+        result = await files_collection.update_many(record_query, threshold_update(threshold))
+        evaluations_changed = await evaluation_store.apply_threshold(row_query, threshold)
+        await role_summaries.adjust_recommended(changes)
+        invalidate_analysis_records(file_ids)
+    metrics.increment("rethreshold.analyses", result.modified_count)
+    return {
+        "analyses": result.modified_count,
+        "evaluations_changed": evaluations_changed,
+        "roles": {
+            key: {"recommended": promoted, "not_recommended": demoted}
+            for key, (promoted, demoted) in changes.items()
+        },
+    }
+
+
+@router.post("/rethreshold/{file_id}")
+async def rethreshold_analysis(
+    file_id: str,
+    recommended_store: int = Query(..., ge=0, le=100),
+    username: str = Depends(get_current_user)
+):
+    """
+    Re-apply a new recommendation threshold to one of the authenticated
+    user's stored analyses.
+
+    Args:
+        file_id (str): The analysis to update.
+        recommended_store (int): New recommendation threshold.
+        username (str): Authenticated user.
+
+    Returns:
+        JSONResponse: The change counts and the updated analysis, or 404 if
+        the analysis does not exist or belongs to someone else.
+    """
+    try:
+        changes = await rethreshold_analyses(
+            {"file_id": file_id, "username": username},
+            {"file_id": file_id, "username": username},
+            recommended_store,
+        )
+        record = await load_analysis_record(file_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if record is None or record.get("username") != username:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return JSONResponse(status_code=200, content={
+        "file_id": file_id,
+        "recommended_store": record.get("recommended_store"),
+        **changes,
+        "analysis": record.get("analysis"),
+    })
+
+
+@router.post("/rethreshold")
+async def rethreshold_job_description(
+    jd: str,
+    recommended_store: int = Query(..., ge=0, le=100),
+    username: str = Depends(get_current_user)
+):
+    """
+    Re-apply a new recommendation threshold to every analysis of the
+    authenticated user against a job description, e.g. to re-screen a whole
+    batch at a different cut-off.
+
+    Args:
+        jd (str): job_description_hash returned by the upload endpoints.
+        recommended_store (int): New recommendation threshold.
+        username (str): Authenticated user.
+
+    Returns:
+        JSONResponse: Analyses updated, evaluation statuses changed and the
+        per-role changes.
+    """
+    try:
+        changes = await rethreshold_analyses(
+            {"username": username, "job_description_hash": jd},
+            {"username": username, "jd_hash": jd},
+            recommended_store,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse(status_code=200, content={"jd": jd, "recommended_store": recommended_store, **changes})
+
+
+def encode_rank_cursor(evaluation):
+    """
+    Encode the keyset position after a ranked evaluation.
+
+    Args:
+        evaluation (dict): Last returned evaluation, with score and _id.
+
+    Returns:
+        str: Opaque cursor for the next page.
+    """
+    position = {"score": evaluation["score"], "_id": str(evaluation["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def decode_rank_cursor(cursor):
+    """
+    Decode a cursor from encode_rank_cursor().
+
+    Args:
+        cursor (str): Opaque cursor.
+
+    Returns:
+        tuple: (score, _id) of the last evaluation already returned.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(position["score"], bool) or not isinstance(position["score"], (int, float)):
+            raise ValueError("score")
+        return position["score"], ObjectId(position["_id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
 
-        return JSONResponse(status_code=200, content=file_data)
 
+@router.get("/rank")
+async def rank_candidates(
+    jd: str,
+    k: int = Query(20, ge=1, le=100),
+    role: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    status: Optional[str] = Query(None, pattern=f"^({RECOMMENDED}|{NOT_RECOMMENDED})$"),
+    cursor: Optional[str] = None,
+    username: str = Depends(get_current_user)
+):
+    """
+    Top-K of the authenticated user's candidates for a job description, by
+    evaluation score.
+
+    Served from the normalized evaluations collection with keyset pagination
+    on (username, jd_hash, [role_key,] score, _id), so each page reads only
+    the rows it returns. A candidate evaluated for several roles appears once per role
+    unless role is given.
+
+    Args:
+        jd (str): job_description_hash returned by the upload endpoints.
+        k (int): Maximum number of candidates per page.
+        role (str | None): Only rank evaluations for this role.
+        min_score (int | None): Only scores >= min_score.
+        max_score (int | None): Only scores <= max_score.
+        status (str | None): "recommended" or "not recommended".
+        cursor (str | None): next_cursor from the previous page.
+        username (str): Authenticated user.
+    Returns:
+        JSONResponse: The ranked evaluations and next_cursor (None on the last page).
+    """
+    after = decode_rank_cursor(cursor) if cursor else None
+    try:
+        # One extra row tells whether there is a next page
+        evaluations = await evaluation_store.top(
+            username, jd, k + 1, role=role, min_score=min_score, max_score=max_score, status=status, after=after
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    next_cursor = encode_rank_cursor(evaluations[k - 1]) if len(evaluations) > k else None
+    items = []
+    for evaluation in evaluations[:k]:
+        evaluation["_id"] = str(evaluation["_id"])
+        if evaluation.get("created_at"):
+            evaluation["created_at"] = evaluation["created_at"].isoformat()
+        items.append(evaluation)
+    return JSONResponse(status_code=200, content={"jd": jd, "items": items, "next_cursor": next_cursor})
+
+
+@router.get("/analytics/roles")
+async def get_role_analytics(limit: int = Query(50, ge=1, le=500)):
+    """
+    List the roles with the most analyses, read from the role summaries.
+
+    Args:
+        limit (int): Maximum number of roles.
+
+    Returns:
+        JSONResponse: Analyses, score statistics, recommended rate and score
+        distribution per role.
+    """
+    return JSONResponse(status_code=200, content={"roles": await role_summaries.list_roles(limit)})
+
+
+@router.get("/analytics/roles/{role}")
+async def get_role_detail(
+    role: str,
+    top: int = Query(20, ge=1, le=200),
+    source: str = Query("summary", pattern="^(summary|live)$"),
+    username: Optional[str] = Depends(get_optional_user),
+):
+    """
+    Score distribution and most common missing skills for one role.
+
+    Args:
+        role (str): Role name as evaluated (case-insensitive).
+        top (int): Number of missing skills to return.
+        source (str): "summary" reads the maintained role summary; "live"
+            aggregates every stored analysis, to check the summary, and is
+            only available to authenticated users.
+        username (str or None): Authenticated user, if any.
+
+    Returns:
+        JSONResponse: The role summary, or 404 if no analysis scored the role.
+
+    Raises:
+        HTTPException: 401 if source is "live" and the request is not
+        authenticated.
+    """
+    if source == "live":
+        # Two full scans of the analyses collection; not for anonymous callers
+        await get_current_user(username)
+        summary = await live_role_summary(files_collection, role, top)
+    else:
+        summary = await role_summaries.get_role(role, top)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No analyses for this role.")
+    return JSONResponse(status_code=200, content=summary)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Report hit/miss statistics for the analysis cache and request coalescing.
+
+    Returns:
+        JSONResponse: Hit and miss counts, hit ratio, in-memory cache size and
+        single-flight executed/coalesced counts.
+    """
+    stats = analysis_cache.stats()
+    stats["structured_resumes"] = structured_resume_cache.stats()
+    stats["extracted_text"] = text_cache.stats()
+    stats["analysis_records"] = record_cache.stats()
+    stats["single_flight"] = {
+        "analysis": analysis_flights.stats(),
+        "record": record_flights.stats(),
+        "structure": structure_flights.stats(),
+        "extraction": extraction_flights.stats(),
+    }
+    return JSONResponse(status_code=200, content=stats)
+
+
+@router.get("/llm/stats")
+async def get_llm_stats():
+    """
+    Report how Gemini responses were parsed.
 
+    Returns:
+        JSONResponse: Parse path counts, parse-failure rate and fallback rate.
+    """
+    return JSONResponse(status_code=200, content=llm_output_stats())
 
+
+@router.get("/prescreen/stats")
+async def get_prescreen_stats():
+    """
+    Report local pre-screen throughput and precision.
+
+    Returns:
+        JSONResponse: Screened/rejected counts, screens per second and the
+        precision measured on shadow-sampled rejections.
+    """
+    return JSONResponse(status_code=200, content=prescreen_stats())
@@ -0,0 +1,79 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# Response schemas passed to Gemini as response_schema. They mirror the JSON
+# shape described in the utils prompt builders, except that evaluations carry
+# the role as a field (schemas cannot express dynamic keys); format_llm_output
+# turns them back into the [{"<role>": {...}}] shape the frontend expects.
+
+
+class PersonalInformation(BaseModel):
+    name: str
+    email: str
+    phone: str
+    linkedin: str
+
+
+class WorkExperience(BaseModel):
+    company: str
+    job_title: str
+    start_date: str
+    end_date: str
+    responsibilities: List[str]
+    achievements: List[str]
+
+
+class Project(BaseModel):
+    name: str
+    description: List[str]
+
+
+class SkillScore(BaseModel):
+    skill: str
+    score: int
+
+
+class Education(BaseModel):
+    college: str
+    degree: Optional[str] = None
+    start_year: str
+    end_year: str
+    percentage: Optional[str] = None
+    cgpa: Optional[str] = None
+
+
+class RoleEvaluation(BaseModel):
+    role: str
+    score: int
+    status: str
+    matchedSkills: str
+    missing: str
+    suggest: str
+    summary: str
+
+
+class StructuredResume(BaseModel):
+    """Output of the resume structuring stage; independent of any job description."""
+    candidateName: str
+    personal_information: PersonalInformation
+    summary: str
+    work_experience: List[WorkExperience]
+    projects: List[Project]
+    skills: List[SkillScore]
+    education: List[Education]
+    certifications: List[str]
+    overall_score: int
+    resume_styling_score: int
+
+
+class JobEvaluation(BaseModel):
+    """Output of the JD evaluation stage for an already structured resume."""
+    overall_summary: str
+    evaluations: List[RoleEvaluation]
+
+
+class ResumeAnalysis(StructuredResume):
+    """Output of the single-call analysis: structuring and evaluation together."""
+    overall_summary: str
+    evaluations: List[RoleEvaluation]
@@ -0,0 +1,66 @@
+"""
+Fill the evaluations collection from analyses stored before /rank existed.
+
+Walks resume_analysis in _id-ordered batches and upserts one evaluation row
+per record and role; rows that already exist are left alone, so the script
+can be stopped and re-run. Records that still embed their texts have no
+job_description_hash and are skipped; run scripts.migrate_documents first.
+
+Run from the backend folder:  python -m scripts.backfill_evaluations [--batch-size N]
+"""
+import argparse
+import asyncio
+
+import resume_analyzer
+from database import close_database, init_database
+from resume_analyzer import evaluation_store
+
+RECORD_FIELDS = {
+    "file_id": 1,
+    "job_description_hash": 1,
+    "filename": 1,
+    "batch_id": 1,
+    "username": 1,
+    "created_at": 1,
+    "analysis.candidateName": 1,
+    "analysis.prescreened": 1,
+    "analysis.evaluations": 1,
+}
+
+
+async def backfill(batch_size):
+    resume_analyzer.bind_database(init_database())
+    try:
+        await backfill_records(resume_analyzer.files_collection, batch_size)
+    finally:
+        close_database()
+
+
+async def backfill_records(files_collection, batch_size):
+    records = inserted = 0
+    last_id = None
+    while True:
+        query = {"job_description_hash": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await files_collection.find(query, RECORD_FIELDS) \
+            .sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        records += len(batch)
+        inserted += await evaluation_store.backfill(batch)
+        print(f"checked {records} records")
+
+    print(f"records: {records}, evaluation rows inserted: {inserted}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
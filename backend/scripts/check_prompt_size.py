@@ -0,0 +1,108 @@
+"""
+Fail when an analysis prompt template grows past its budget.
+
+Builds each prompt (single-call, structuring and evaluation) for a fixed
+sample resume and job description and checks that (a) the template overhead
+stays within the budget for its current version and (b) each document is
+embedded only once, i.e. growing the documents grows the prompt by the same
+amount.
+
+Run from the backend folder:  python -m scripts.check_prompt_size
+"""
+import sys
+
+from utils import (
+    EVALUATION_PROMPT_VERSION,
+    PROMPT_VERSION,
+    STRUCTURING_PROMPT_VERSION,
+    generate_evaluation_prompt,
+    generate_prompt_new,
+    generate_structuring_prompt,
+    prompt_stats,
+)
+
+# Maximum estimated tokens a template may add on top of the documents
+TEMPLATE_TOKEN_BUDGETS = {
+    "v2": 2500,
+    "v3": 2500,
+    "s1": 600,
+    "e1": 700,
+}
+
+SAMPLE_RESUME = (
+    "Charlie Example\ncharlie@example.com | +123456789 | linkedin.com/in/charlie\n"
+    "Software Engineer, TechCorp (2020-2023): built Python/Flask services, "
+    "led backend development, reduced processing time by 30%.\n"
+    "Skills: Python, Flask, MongoDB, Docker, AWS\n"
+    "B.S. Computer Science, ABC University (2015-2019)\n"
+) * 10
+
+SAMPLE_JD = (
+    "Backend Developer\nRequirements: Python, FastAPI, PostgreSQL, Docker, "
+    "3+ years building REST APIs, experience with cloud deployments.\n"
+) * 10
+
+
+# Stands in for the structuring stage output; its size scales like a resume
+SAMPLE_STRUCTURED = {"candidateName": "Charlie Example", "summary": SAMPLE_RESUME}
+
+TEMPLATES = [
+    (PROMPT_VERSION, lambda resume, jd: generate_prompt_new(resume, jd, 70), True),
+    (STRUCTURING_PROMPT_VERSION, lambda resume, jd: generate_structuring_prompt(resume), False),
+    (
+        EVALUATION_PROMPT_VERSION,
+        lambda resume, jd: generate_evaluation_prompt({**SAMPLE_STRUCTURED, "summary": resume}, jd, 70),
+        True,
+    ),
+]
+
+
+def check_template(version, build, uses_jd):
+    """
+    Check one prompt template against its budget.
+
+    Args:
+        version (str): Template version.
+        build (Callable[[str, str], str]): Builds the prompt from resume and JD text.
+        uses_jd (bool): Whether the template embeds the job description.
+
+    Returns:
+        list: Failure messages (empty if the template is within budget).
+    """
+    prompt = build(SAMPLE_RESUME, SAMPLE_JD)
+    stats = prompt_stats(prompt, version)
+    documents_chars = len(SAMPLE_RESUME) + (len(SAMPLE_JD) if uses_jd else 0)
+    overhead_tokens = stats["tokens"] - (documents_chars + 3) // 4
+    print(
+        f"prompt {version}: {stats['chars']} chars, ~{stats['tokens']} tokens "
+        f"(template overhead ~{overhead_tokens} tokens)"
+    )
+
+    failures = []
+    budget = TEMPLATE_TOKEN_BUDGETS.get(version)
+    if budget is None:
+        failures.append(f"{version}: no token budget declared")
+    elif overhead_tokens > budget:
+        failures.append(f"{version}: template overhead {overhead_tokens} tokens exceeds budget {budget}")
+
+    # Doubling the documents must grow the prompt by the documents' size only
+    doubled = build(SAMPLE_RESUME * 2, SAMPLE_JD * 2)
+    growth = len(doubled) - len(prompt)
+    if growth > documents_chars * 1.05:
+        repeats = growth / documents_chars
+        failures.append(f"{version}: documents are embedded {repeats:.1f} times; expected once")
+    return failures
+
+
+def main():
+    failures = []
+    for version, build, uses_jd in TEMPLATES:
+        failures.extend(check_template(version, build, uses_jd))
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
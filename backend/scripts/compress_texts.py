@@ -0,0 +1,79 @@
+"""
+Re-encode stored texts with the configured TEXT_COMPRESSION codec.
+
+Walks the documents collection and the extracted-text cache in _id-ordered
+batches and rewrites every text whose stored codec differs from the target:
+plain strings are compressed, texts in another codec are re-encoded, and with
+--codec none everything is decompressed again. Texts under
+TEXT_COMPRESSION_MIN_BYTES stay plain. Safe to stop and re-run.
+
+Run from the backend folder:  python -m scripts.compress_texts [--codec zstd] [--batch-size N] [--dry-run]
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from compression import TEXT_CODECS, check_codec, compress_text, decompress_text
+from constants import TEXT_COMPRESSION, TEXT_COMPRESSION_MIN_BYTES
+from database import close_database, init_database
+from resume_analyzer import bind_database, document_store, text_cache
+
+
+async def convert(collection, codec, batch_size, dry_run):
+    checked = rewritten = bytes_before = bytes_after = 0
+    last_id = None
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await collection.find(query, {"text": 1, "codec": 1}) \
+            .sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = []
+        for document in batch:
+            checked += 1
+            stored_codec = document.get("codec")
+            text = decompress_text(document["text"], stored_codec)
+            value, new_codec = compress_text(text, codec, TEXT_COMPRESSION_MIN_BYTES)
+            if new_codec == stored_codec:
+                continue
+            bytes_before += len(document["text"]) if stored_codec else len(text.encode("utf-8"))
+            bytes_after += len(value) if new_codec else len(text.encode("utf-8"))
+            update = {"$set": {"text": value}}
+            if new_codec is None:
+                update["$unset"] = {"codec": ""}
+            else:
+                update["$set"]["codec"] = new_codec
+            operations.append(UpdateOne({"_id": document["_id"]}, update))
+
+        rewritten += len(operations)
+        if operations and not dry_run:
+            await collection.bulk_write(operations, ordered=False)
+
+    print(f"{collection.name}: checked {checked}, {'would rewrite' if dry_run else 'rewrote'} {rewritten}, "
+          f"{bytes_before:,} -> {bytes_after:,} bytes")
+
+
+async def main_async(codec, batch_size, dry_run):
+    bind_database(init_database())
+    try:
+        for collection in (document_store.collection, text_cache.collection):
+            await convert(collection, codec, batch_size, dry_run)
+    finally:
+        close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--codec", choices=TEXT_CODECS, default=TEXT_COMPRESSION)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be rewritten")
+    args = parser.parse_args()
+    check_codec(args.codec)
+    asyncio.run(main_async(args.codec, args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Move resume and JD texts embedded in resume_analysis records into the
+content-addressed documents collection.
+
+Records that still carry resume_text or job_description are processed in
+batches: each distinct text is stored once, then the embedded texts are
+replaced by resume_text_hash / job_description_hash. Migrated records no
+longer match, so the script can be stopped and re-run at any point.
+
+Run from the backend folder:  python -m scripts.migrate_documents [--batch-size N] [--dry-run]
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+import resume_analyzer
+from database import close_database, init_database
+from documents import text_hash
+from resume_analyzer import document_store
+
+# Embedded text field -> hash field that replaces it
+TEXT_FIELDS = {
+    "resume_text": "resume_text_hash",
+    "job_description": "job_description_hash",
+}
+
+PENDING = {"$or": [{field: {"$exists": True}} for field in TEXT_FIELDS]}
+
+
+async def migrate(batch_size, dry_run):
+    resume_analyzer.bind_database(init_database())
+    try:
+        await migrate_records(resume_analyzer.files_collection, batch_size, dry_run)
+    finally:
+        close_database()
+
+
+async def migrate_records(files_collection, batch_size, dry_run):
+    records = texts_seen = chars_moved = 0
+    distinct = set()
+    last_id = None
+    while True:
+        query = PENDING if last_id is None else {"$and": [PENDING, {"_id": {"$gt": last_id}}]}
+        batch = await files_collection.find(query, {field: 1 for field in TEXT_FIELDS}) \
+            .sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        texts = []
+        operations = []
+        for record in batch:
+            update = {"$set": {}, "$unset": {}}
+            for field, hash_field in TEXT_FIELDS.items():
+                if field not in record:
+                    continue
+                update["$unset"][field] = ""
+                text = record[field]
+                if isinstance(text, str):
+                    texts.append(text)
+                    update["$set"][hash_field] = text_hash(text)
+                    chars_moved += len(text)
+            if not update["$set"]:
+                del update["$set"]
+            operations.append(UpdateOne({"_id": record["_id"]}, update))
+
+        distinct.update(text_hash(text) for text in texts)
+        records += len(batch)
+        texts_seen += len(texts)
+        if not dry_run:
+            await document_store.put_many(texts)
+            await files_collection.bulk_write(operations, ordered=False)
+        print(f"{'checked' if dry_run else 'migrated'} {records} records")
+
+    print(f"records: {records}, texts: {texts_seen}, distinct texts: {len(distinct)}, "
+          f"chars moved out of records: {chars_moved:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be migrated")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
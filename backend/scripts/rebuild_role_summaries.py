@@ -0,0 +1,34 @@
+"""
+Recompute the role_summaries collection from every stored analysis.
+
+Needed once after deploying role analytics, for analyses stored before it, and
+to repair drift if a summary update failed (see role_summaries.update_failed in
+/metrics). The new summaries replace the old ones in one rename; analyses
+stored while the script runs may be missed, so run it when uploads are paused.
+
+Run from the backend folder:  python -m scripts.rebuild_role_summaries
+"""
+import asyncio
+import time
+
+import resume_analyzer
+from database import close_database, init_database
+from resume_analyzer import role_summaries
+
+
+async def main_async():
+    resume_analyzer.bind_database(init_database())
+    try:
+        start = time.perf_counter()
+        roles = await role_summaries.rebuild(resume_analyzer.files_collection)
+        print(f"rebuilt {roles} role summaries in {time.perf_counter() - start:.1f}s")
+    finally:
+        close_database()
+
+
+def main():
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import asyncio
+
+import metrics
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. The work
+    is shielded, so a caller that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Name used as the metrics prefix, e.g. "analysis".
+        """
+        self.name = name
+        self._in_flight = {}
+
+    def join(self, key, fn):
+        """
+        Start fn() for a key, or join the call already in flight for it,
+        without waiting for the result. Lets the caller that started the work
+        consume side effects of it (e.g. streamed output) while joiners await
+        the task.
+
+        Args:
+            key (str): Flight key, usually a content hash.
+            fn (Callable[[], Awaitable]): Coroutine function doing the work.
+
+        Returns:
+            tuple: (task, coalesced) where coalesced is True if the task was
+            started by someone else. Await it through asyncio.shield().
+        """
+        task = self._in_flight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            metrics.increment(f"singleflight.{self.name}.coalesced")
+        else:
+            metrics.increment(f"singleflight.{self.name}.executed")
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task, coalesced
+
+    async def do(self, key, fn):
+        """
+        Run fn() once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Flight key, usually a content hash.
+            fn (Callable[[], Awaitable]): Coroutine function doing the work.
+
+        Returns:
+            tuple: (result, coalesced) where coalesced is True if this caller
+            joined a call started by someone else.
+        """
+        task, coalesced = self.join(key, fn)
+        return await asyncio.shield(task), coalesced
+
+    def _finish(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        """
+        Get coalescing statistics.
+
+        Returns:
+            dict: Executed and coalesced call counts and the number in flight.
+        """
+        return {
+            "executed": metrics.get_counter(f"singleflight.{self.name}.executed"),
+            "coalesced": metrics.get_counter(f"singleflight.{self.name}.coalesced"),
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,61 @@
+from text_normalize import normalize_pages
+
+
+def test_single_page_keeps_number_lines():
+    page = "Jane Doe\n5551234567\n2020\n06/2020\nSoftware Engineer\n3\n12"
+    assert normalize_pages([page]) == page + "\n"
+
+
+def test_page_numbers_recurring_at_an_edge_are_dropped():
+    pages = ["Experience\nAcme Corp\nPage 1 of 3", "Education\nBSc\nPage 2 of 3", "Skills\nPython\nPage 3 of 3"]
+    assert normalize_pages(pages) == "Experience\nAcme Corp\nEducation\nBSc\nSkills\nPython\n"
+
+
+def test_number_lines_not_recurring_at_an_edge_are_kept():
+    pages = [
+        "Jane Doe\nSummary\nMore\nText\nHere\nEnd",
+        "Education\nDegree\nMore\nText\nHere\n2020",
+        "Projects\n06/2020\nMore\nText\nHere\nFinal",
+    ]
+    text = normalize_pages(pages)
+    assert "2020\n" in text
+    assert "06/2020" in text
+
+
+def test_short_numbers_recurring_at_an_edge_are_dropped():
+    pages = ["- 1 -\nSummary\nBackend engineer", "- 2 -\nExperience\nAcme Corp", "- 3 -\nSkills\nPython"]
+    assert normalize_pages(pages) == "Summary\nBackend engineer\nExperience\nAcme Corp\nSkills\nPython\n"
+
+
+def test_hyphenated_compound_keeps_its_hyphen():
+    assert normalize_pages(["A self-\nmotivated engineer"]) == "A self-motivated engineer\n"
+
+
+def test_hyphen_before_capitalized_line_is_kept():
+    assert normalize_pages(["Skills: C-\nPython"]) == "Skills: C-\nPython\n"
+
+
+def test_date_lines_at_page_edges_are_kept():
+    pages = ["Acme Corp\nSoftware Engineer\n2016 - 2018", "Beta Inc\n2019 - 2021\nBackend Developer"]
+    assert normalize_pages(pages) == (
+        "Acme Corp\nSoftware Engineer\n2016 - 2018\nBeta Inc\n2019 - 2021\nBackend Developer\n"
+    )
+
+
+def test_edge_lines_differing_only_in_digits_are_kept():
+    pages = [f"python docker line {index}\nbody {index}\nkafka line {index + 40}" for index in range(40)]
+    text = normalize_pages(pages)
+    assert all(f"python docker line {index}\n" in text for index in range(40))
+
+
+def test_running_header_repeated_verbatim_is_kept_once():
+    pages = [f"Jane Doe | jane@example.com\nSection {index}\nDetails {index}" for index in range(3)]
+    assert normalize_pages(pages).count("Jane Doe") == 1
+
+
+def test_words_broken_across_lines_are_rejoined():
+    assert normalize_pages(["experi-\nenced in develop-\nment"]) == "experienced in development\n"
+
+
+def test_skills_broken_across_lines_are_rejoined():
+    assert normalize_pages(["Kuber-\nnetes and co-\nordinated releases"]) == "Kubernetes and coordinated releases\n"
@@ -0,0 +1,121 @@
+import re
+from collections import Counter
+
+from prescreen import _SKILL_LOOKUP
+
+# Runs of spaces, tabs and other non-newline whitespace (incl. no-break spaces)
+_SPACES_RE = re.compile(r"[^\S\n]+")
+# A word broken after a hyphen at the end of a line and continued in lowercase
+_HYPHEN_BREAK_RE = re.compile(r"([A-Za-z]+)-\n+([a-z]+)")
+# First halves of hyphenated compounds common in resumes ("self-motivated",
+# "cross-functional"); these keep their hyphen when rejoined
+_COMPOUND_HEADS = frozenset({
+    "back", "client", "cloud", "co", "cost", "cross", "customer", "data", "detail",
+    "end", "fast", "front", "full", "goal", "hands", "high", "long", "low", "multi",
+    "non", "open", "part", "problem", "real", "results", "self", "short", "team",
+    "time", "user", "well", "world",
+})
+# Words starting with a compound head that are still written as one word
+_COMMON_WORDS = frozenset({
+    "backend", "backlog", "collaborated", "collaboration", "communicated", "communication",
+    "coordinated", "coordination", "customers", "database", "databases", "dataset",
+    "datasets", "endpoint", "endpoints", "frontend", "highlights", "nonprofit",
+    "opensource", "partnered", "partnership", "realtime", "teamwork", "timeline",
+    "timelines", "userbase", "worldwide",
+})
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+# "3", "- 3 -", "Page 3", "Page 3 of 7", "3/7"; short numbers only, so years,
+# phone numbers and dates like "06/2020" do not match
+_PAGE_NUMBER_RE = re.compile(r"^[-–\s]*(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?[-–\s]*$", re.IGNORECASE)
+
+
+def _join_hyphen_break(match):
+    # Skills and common words are joined ("kuber-netes" -> "kubernetes"),
+    # known compounds keep their hyphen, other words are joined
+    head, tail = match.group(1), match.group(2)
+    word = head + tail
+    if word.lower() not in _SKILL_LOOKUP and word.lower() not in _COMMON_WORDS \
+            and head.lower() in _COMPOUND_HEADS:
+        return f"{head}-{tail}"
+    return word
+
+
+def _edge_indexes(line_count, edge_lines):
+    """Indexes of the first and last edge_lines lines of a page."""
+    if line_count <= 2 * edge_lines:
+        return range(line_count)
+    return [*range(edge_lines), *range(line_count - edge_lines, line_count)]
+
+
+def _edge(line_count, index):
+    """Whether a line is at the top or the bottom of its page."""
+    return "top" if index < line_count / 2 else "bottom"
+
+
+def normalize_pages(pages, repeat_ratio=0.5, edge_lines=3):
+    """
+    Clean extracted PDF pages into compact text for prompting.
+
+    Collapses whitespace, drops lines repeated verbatim at the top or bottom of
+    many pages (running headers and footers, kept once on their first page so
+    a name or contact line is not lost) and page numbers found at the same
+    edge of many pages, rejoins words hyphenated across line breaks and
+    squeezes blank lines. Single pages keep all their lines.
+
+    Args:
+        pages (list): Text of each page.
+        repeat_ratio (float): Fraction of pages an edge line must appear on to
+            count as a header, footer or page number. Headers and footers need
+            3+ pages, page numbers 2+.
+        edge_lines (int): Lines at the top and bottom of each page checked for
+            headers, footers and page numbers.
+
+    Returns:
+        str: The normalized text.
+    """
+    page_lines = [
+        [line.strip() for line in _SPACES_RE.sub(" ", page).split("\n")]
+        for page in pages
+    ]
+
+    repeated = set()
+    numbered_edges = set()
+    if len(page_lines) >= 2:
+        # Headers and footers repeat verbatim; page numbers differ per page and
+        # are counted per edge instead
+        counts = Counter()
+        number_counts = Counter()
+        for lines in page_lines:
+            counts.update({
+                lines[index]
+                for index in _edge_indexes(len(lines), edge_lines)
+                if lines[index]
+            })
+            number_counts.update({
+                _edge(len(lines), index)
+                for index in _edge_indexes(len(lines), edge_lines)
+                if _PAGE_NUMBER_RE.match(lines[index])
+            })
+        min_pages = repeat_ratio * len(page_lines)
+        repeated = {line for line, count in counts.items() if count >= max(3, min_pages)}
+        numbered_edges = {edge for edge, count in number_counts.items() if count >= max(2, min_pages)}
+
+    seen = set()
+    kept_pages = []
+    for lines in page_lines:
+        drop = set()
+        for index in _edge_indexes(len(lines), edge_lines):
+            line = lines[index]
+            if _edge(len(lines), index) in numbered_edges and _PAGE_NUMBER_RE.match(line):
+                drop.add(index)
+                continue
+            if line in repeated:
+                if line in seen:
+                    drop.add(index)
+                seen.add(line)
+        kept_pages.append("\n".join(line for index, line in enumerate(lines) if index not in drop))
+
+    text = "\n".join(kept_pages)
+    text = _HYPHEN_BREAK_RE.sub(_join_hyphen_break, text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip() + "\n" if text.strip() else ""
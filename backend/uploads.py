@@ -0,0 +1,86 @@
+import hashlib
+
+import constants
+import metrics
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an uploaded file exceeds UPLOAD_MAX_BYTES."""
+
+
+class SpooledUpload:
+    """
+    An uploaded file, held in the spooled temporary file Starlette parsed it
+    into, with the SHA-256 of its bytes.
+    """
+
+    def __init__(self, filename, content_type, file, digest, size):
+        """
+        Args:
+            filename (str): Name of the uploaded file.
+            content_type (str): MIME type of the uploaded file.
+            file (UploadFile): The upload holding the bytes.
+            digest (str): Hex SHA-256 of the bytes.
+            size (int): Size of the upload in bytes.
+        """
+        self.filename = filename
+        self.content_type = content_type
+        self.file = file
+        self.digest = digest
+        self.size = size
+
+    async def read_bytes(self):
+        """
+        Read the whole upload from its temporary file.
+
+        Returns:
+            bytes: The uploaded file contents.
+        """
+        await self.file.seek(0)
+        return await self.file.read()
+
+    async def close(self):
+        """Close the upload, deleting its temporary file."""
+        await self.file.close()
+
+
+async def spool_upload(upload, max_bytes=None):
+    """
+    Hash an upload in chunks, stopping as soon as it exceeds the size limit.
+
+    Starlette has already spooled the file while parsing the form (in memory
+    up to its spool size, on disk beyond), so it is read in place rather than
+    copied; the request size itself is bounded before parsing by main.py.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+        max_bytes (int | None): Size limit, defaults to UPLOAD_MAX_BYTES.
+
+    Returns:
+        SpooledUpload: The upload with its digest and size.
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes.
+    """
+    max_bytes = constants.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    too_large = UploadTooLargeError(f"{upload.filename} is larger than the upload limit of {max_bytes} bytes.")
+    if upload.size is not None and upload.size > max_bytes:
+        metrics.increment("upload.rejected_too_large")
+        raise too_large
+
+    sha256 = hashlib.sha256()
+    size = 0
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(constants.UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            metrics.increment("upload.rejected_too_large")
+            raise too_large
+        sha256.update(chunk)
+    await upload.seek(0)
+
+    metrics.observe("upload.bytes", size)
+    return SpooledUpload(upload.filename, upload.content_type, upload, sha256.hexdigest(), size)
@@ -1,25 +1,143 @@
 from google import genai
 import constants as constants
 import json
+from google.genai import types
 from google.genai.types import GenerateContentResponse
+from pydantic import BaseModel
 import re
+import asyncio
+import metrics
+from schemas import ResumeAnalysis
 
-def get_gemini_response(prompt):
+# Bump whenever generate_prompt_new changes so cached analyses are not reused
+PROMPT_VERSION = "v3"
+
+# Versions of the two-stage pipeline prompts (structuring, then JD evaluation)
+STRUCTURING_PROMPT_VERSION = "s1"
+EVALUATION_PROMPT_VERSION = "e1"
+
+# Long-lived Gemini client shared by every request, created at app startup
+gemini_client = None
+
+# Caps the number of in-flight Gemini calls per worker
+gemini_semaphore = None
+
+def init_gemini_client():
+    """
+    Create the shared Gemini client and concurrency limiter.
+
+    Returns:
+        genai.Client: The shared Gemini client.
+    """
+    global gemini_client, gemini_semaphore
+    if gemini_client is None:
+        gemini_client = genai.Client(api_key=constants.GEMINI_API_KEY)
+    if gemini_semaphore is None:
+        gemini_semaphore = asyncio.Semaphore(constants.GEMINI_MAX_CONCURRENCY)
+    return gemini_client
+
+async def close_gemini_client():
+    """
+    Close the shared Gemini client and release its connection pools.
+    """
+    global gemini_client, gemini_semaphore
+    if gemini_client is not None:
+        await gemini_client.aio.aclose()
+        gemini_client.close()
+    gemini_client = None
+    gemini_semaphore = None
+
+def gemini_config(response_schema=ResumeAnalysis):
+    """
+    Build the generation config for analysis calls.
+
+    With GEMINI_JSON_MODE enabled, Gemini is asked for bare JSON matching the
+    given schema, so the response can be parsed without regex cleanup.
+
+    Args:
+        response_schema (type[BaseModel]): Schema the response must follow.
+
+    Returns:
+        types.GenerateContentConfig | None: The config, or None for plain text output.
+    """
+    if not constants.GEMINI_JSON_MODE:
+        return None
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema,
+    )
+
+async def get_gemini_response_async(prompt, response_schema=ResumeAnalysis):
+    """
+    Get response from Gemini LLM without blocking the event loop.
+
+    At most GEMINI_MAX_CONCURRENCY calls are in flight at once; extra
+    callers wait for a free slot.
+
+    Args:
+        prompt (str): The prompt to send to the Gemini LLM.
+        response_schema (type[BaseModel]): Schema the response must follow in JSON mode.
+
+    Returns:
+        GenerateContentResponse: The response from the Gemini LLM.
+    """
+    client = init_gemini_client()
+    async with gemini_semaphore:
+        metrics.increment("gemini.calls")
+        with metrics.timer("gemini.latency"):
+            response = await client.aio.models.generate_content(
+                model=constants.GEMINI_MODEL,
+                contents=prompt,
+                config=gemini_config(response_schema)
+            )
+    return response
+
+async def get_gemini_response_stream(prompt, response_schema=ResumeAnalysis):
+    """
+    Stream the Gemini LLM response text as it is generated.
+
+    Holds one GEMINI_MAX_CONCURRENCY slot for the whole stream.
+
+    Args:
+        prompt (str): The prompt to send to the Gemini LLM.
+        response_schema (type[BaseModel]): Schema the response must follow in JSON mode.
+
+    Yields:
+        str: Successive chunks of response text.
+    """
+    client = init_gemini_client()
+    async with gemini_semaphore:
+        metrics.increment("gemini.calls")
+        with metrics.timer("gemini.latency"):
+            stream = await client.aio.models.generate_content_stream(
+                model=constants.GEMINI_MODEL,
+                contents=prompt,
+                config=gemini_config(response_schema)
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+
+def get_gemini_response(prompt, response_schema=ResumeAnalysis):
     """
     Get response from Gemini LLM using the provided prompt.
 
+    Blocking; async handlers should use get_gemini_response_async instead.
+
     Args:
         prompt (str): The prompt to send to the Gemini LLM.
+        response_schema (type[BaseModel]): Schema the response must follow in JSON mode.
 
     Returns:
         str: The response from the Gemini LLM.
     """
 
-    client = genai.Client(api_key=constants.GEMINI_API_KEY)
+    client = init_gemini_client()
 
     response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
+            model=constants.GEMINI_MODEL,
+            contents=prompt,
+            config=gemini_config(response_schema)
         )
     # genai.configure(api_key=constants.GEMINI_API_KEY)
     # #gemini_llm = genai.GenerativeModel('gemini-1.5-flash')
@@ -60,25 +178,74 @@ def generate_prompt(resume_text, job_descrption, recommended_store):
     """
     return prompt
 
+def normalize_evaluations(output):
+    """
+    Convert schema-style evaluations into the role-keyed shape the frontend expects.
+
+    [{"role": "Backend Developer", "score": 68, ...}] becomes
+    [{"Backend Developer": {"score": 68, ...}}]. Output already in the
+    role-keyed shape is returned unchanged.
+
+    Args:
+        output (dict): Parsed LLM output.
+
+    Returns:
+        dict: The output with normalized evaluations.
+    """
+    if not isinstance(output, dict):
+        return output
+    evaluations = output.get("evaluations")
+    if (
+        isinstance(evaluations, list)
+        and evaluations
+        and all(isinstance(item, dict) and isinstance(item.get("role"), str) for item in evaluations)
+    ):
+        output["evaluations"] = [{
+            item["role"]: {key: value for key, value in item.items() if key != "role"}
+            for item in evaluations
+        }]
+    return output
+
 def format_llm_output(response):
     """
     Format the output from the Gemini LLM response.
 
+    Tries, in order: the SDK's schema-parsed object, plain json.loads of the
+    text (JSON mode), and finally stripping markdown code fences. Which path
+    succeeded is counted in metrics (see llm_output_stats).
+
     Args:
-        response (GenerateContentResponse): The response from the Gemini LLM.
+        response (GenerateContentResponse | str): The response from the Gemini LLM, or its text.
 
     Returns:
         dict: The formatted output.
     """
+    metrics.increment("llm_output.total")
     try:
+        # Fast path: the SDK already validated the response against the schema
+        parsed = getattr(response, 'parsed', None)
+        if isinstance(parsed, BaseModel):
+            metrics.increment("llm_output.parsed_schema")
+            return normalize_evaluations(parsed.model_dump(exclude_none=True))
+
         # Extract the text content from the response
-        if hasattr(response, 'text'):
+        if isinstance(response, str):
+            response_text = response
+        elif hasattr(response, 'text'):
             response_text = response.text
         elif hasattr(response, 'content'):
             response_text = response.content
         else:
             raise ValueError("Response does not contain text or content attribute")
 
+        # JSON mode returns bare JSON, so try it before any cleanup
+        try:
+            formatted_output = json.loads(response_text)
+            metrics.increment("llm_output.parsed_json")
+            return normalize_evaluations(formatted_output)
+        except json.JSONDecodeError:
+            pass
+
         # Clean the response text to extract JSON from markdown code blocks
         # Remove markdown code block formatting if present
         if response_text.strip().startswith('```json'):
@@ -94,19 +261,96 @@ def format_llm_output(response):
 
         # Attempt to parse the response text as JSON
         try:
-            formatted_output = json.loads(response_text)
+            formatted_output = normalize_evaluations(json.loads(response_text))
+            metrics.increment("llm_output.parsed_fenced")
         except json.JSONDecodeError:
             # If JSON parsing fails, return the raw text in a dictionary
+            metrics.increment("llm_output.parse_failed")
             formatted_output = {"raw_response": response_text}
         return formatted_output
     except Exception as e:
+        metrics.increment("llm_output.parse_failed")
         print(f"Error formatting LLM output: {e}")
         return {"error": str(e)}
 
+def llm_output_stats():
+    """
+    Report how LLM responses were parsed.
+
+    Returns:
+        dict: Counts per parse path plus parse-failure and fallback rates, where
+        fallback means anything slower than the schema/plain-JSON fast paths.
+    """
+    total = metrics.get_counter("llm_output.total")
+    failed = metrics.get_counter("llm_output.parse_failed")
+    fenced = metrics.get_counter("llm_output.parsed_fenced")
+    return {
+        "total": total,
+        "parsed_schema": metrics.get_counter("llm_output.parsed_schema"),
+        "parsed_json": metrics.get_counter("llm_output.parsed_json"),
+        "parsed_fenced": fenced,
+        "parse_failed": failed,
+        "parse_failure_rate": round(failed / total, 4) if total else 0.0,
+        "fallback_rate": round((fenced + failed) / total, 4) if total else 0.0,
+    }
+
+def delimit_document(label, text):
+    """
+    Wrap a document in <LABEL>...</LABEL> tags so the prompt can refer to it by label.
+
+    Any copy of the closing tag inside the text is removed so the document
+    cannot end its own block early.
+
+    Args:
+        label (str): Block label, e.g. "RESUME".
+        text (str): Document text.
+
+    Returns:
+        str: The delimited document block.
+    """
+    closing_tag = f"</{label}>"
+    text = str(text).replace(closing_tag, "")
+    return f"<{label}>\n{text.strip()}\n{closing_tag}"
+
+def estimate_tokens(text):
+    """
+    Estimate the Gemini token count of a text without calling the API.
+
+    Uses the ~4 characters per token rule of thumb for English text, which is
+    close enough to track prompt size trends and catch template regressions.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    return (len(text) + 3) // 4
+
+def prompt_stats(prompt, prompt_version=PROMPT_VERSION):
+    """
+    Report the size of a prompt.
+
+    Args:
+        prompt (str): The generated prompt.
+        prompt_version (str): Version of the template that built the prompt.
+
+    Returns:
+        dict: Prompt version, character count and estimated token count.
+    """
+    return {
+        "prompt_version": prompt_version,
+        "chars": len(prompt),
+        "tokens": estimate_tokens(prompt),
+    }
+
 def generate_prompt_new(text_content,jd,recommended_score):
     
     """
     Generate a prompt for analyzing resumes against job descriptions.
+
+    The resume and job descriptions are each placed once in delimited blocks
+    and the instructions refer to them by label.
  
     Args:
         text_content (str): The resume content.
@@ -117,10 +361,14 @@ def generate_prompt_new(text_content,jd,recommended_score):
     """
 
     resume_analysis_prompt = f"""
-      Analyze the provided resume {text_content} and evaluate it against job descriptions {jd}. Extract structured information from {text_content} and compare it with each job description in {jd} to assess the candidate's fit for multiple roles. The evaluation should include detailed resume parsing and role-specific assessments.
+{delimit_document("RESUME", text_content)}
+
+{delimit_document("JOB_DESCRIPTIONS", jd)}
+
+      Analyze the resume in the <RESUME> block and evaluate it against the job descriptions in the <JOB_DESCRIPTIONS> block. Extract structured information from RESUME and compare it with each job description in JOB_DESCRIPTIONS to assess the candidate's fit for multiple roles. The evaluation should include detailed resume parsing and role-specific assessments.
 
       1. **Resume Parsing and Section Extraction**
-        - Parse {text_content} to extract and structure the following sections:
+        - Parse RESUME to extract and structure the following sections:
           - **Personal Information**: Name, Email, Phone, LinkedIn, etc.
           - **Summary/Objective**: A brief professional summary or objective.
           - **Work Experience**: Company, Job Title, Start Date, End Date, Responsibilities, Achievements.
@@ -140,14 +388,14 @@ def generate_prompt_new(text_content,jd,recommended_score):
         - **Vocabulary Score (1-10):**
           - Assesses the quality and variety of vocabulary used.
         - **Skill Score per Skill (0-10):**
-          - Calculated based on years of experience, number of projects, and proficiency level indicated in {text_content}.
+          - Calculated based on years of experience, number of projects, and proficiency level indicated in RESUME.
         - **Suggestions for Improvement:**
           - Provide recommendations for vocabulary, grammar, and formatting (scores to be included in suggestions section).
 
       3. **Evaluation Criteria for Each Job Description**
-        - For each job description, **STRICTLY** extract exact title or role from {jd} and keep it same and short for every resume, then evaluate the resume based on:
+        - For each job description, **STRICTLY** extract exact title or role from JOB_DESCRIPTIONS and keep it same and short for every resume, then evaluate the resume based on:
           - **Score (0-100):**
-            - Calculated based on the **relevance and actual usage** of the required skills from the job description in {text_content}.
+            - Calculated based on the **relevance and actual usage** of the required skills from the job description in RESUME.
             - **STRICTLY evaluate** whether each required skill in the JD is **explicitly used** in the candidate’s **work experience or projects**, not just listed in skills.
             - Also check for **years of experience** and context of usage (e.g., job roles, projects, certifications).
             - If skills are mentioned only in the skill list but not reflected in practical experience, consider them as **insufficient evidence**.
@@ -159,16 +407,16 @@ def generate_prompt_new(text_content,jd,recommended_score):
           - **Resume styling score (0-10):**
             - Based on vocabulary, grammar, and formatting.
           - **Matched Skills:**
-            - List top 3 matching skills from {text_content} that are required in the JD.
+            - List top 3 matching skills from RESUME that are required in the JD.
           - **Missing Skills:**
-            - Identify up to 5 key skills required by the JD that are missing or insufficiently demonstrated in {text_content}.
+            - Identify up to 5 key skills required by the JD that are missing or insufficiently demonstrated in RESUME.
           - **Suggestions:**
             - Provide recommendations for improving the resume to better align with the JD.
           - **Summary:**
             - Clear explanation of candidate’s fit. If status is "recommended" but alignment is weak, explicitly state "Resume is not aligned with the JD".
 
       4. **Overall Summary**
-        - Provide a mandatory summary of the candidate's overall fit for all roles in {jd}. Clearly state which role(s) the candidate is best suited for and why.
+        - Provide a mandatory summary of the candidate's overall fit for all roles in JOB_DESCRIPTIONS. Clearly state which role(s) the candidate is best suited for and why.
 
       5. **STRICTLY JSON Output Format:**
 
@@ -226,8 +474,9 @@ def generate_prompt_new(text_content,jd,recommended_score):
         "certifications": ["AWS Certified Solutions Architect"],
         "overall_score": 85,
         "overall_summary": "Candidate is a strong fit for Backend Developer role but does not align with DevOps or UI roles.",
-        "evaluations": [{{
-          "Backend Developer": {{
+        "evaluations": [
+          {{
+            "role": "Backend Developer",
             "score": 68,
             "status":"recommended",
             "matchedSkills": "Python, Flask",
@@ -235,7 +484,8 @@ def generate_prompt_new(text_content,jd,recommended_score):
             "suggest": "Consider including experience with FastAPI and relational databases",
             "summary": "Score meets threshold but resume is not fully aligned due to missing backend tech stack."
           }},
-          "UI Developer": {{
+          {{
+            "role": "UI Developer",
             "score": 5,
             "status":"recommended",
             "matchedSkills": "Jira, XML, Communication",
@@ -243,22 +493,99 @@ def generate_prompt_new(text_content,jd,recommended_score):
             "suggest": "Add experience with mandatory UI tech like React and Angular",
             "summary": "Score meets threshold but resume is not aligned with UI development requirements."
           }}
-        }}],
+        ],
         "resume_styling_score": 8
       }}
       ```
       5. **Processing Guidelines:**  
-        - STRICTLY verify actual usage of required skills in JD by checking whether they appear in the candidate’s work experience or projects in {text_content}. Do not consider a skill sufficient if it is mentioned only in the skill list — there must be contextual evidence of usage (e.g., used in a project, job responsibility, or achievement).
-        - Treat {text_content} as a single resume (not a list) and extract relevant details once for structuring sections and comparison against all job descriptions in {jd}.  
-        - **STRICTLY** base evaluations on {text_content} and {jd} and extract title or role from {jd} and keep it same and short for every resume.  
-        - Calculate skill scores based on evidence in {text_content} (e.g., years of experience, project involvement).  
+        - STRICTLY verify actual usage of required skills in JD by checking whether they appear in the candidate’s work experience or projects in RESUME. Do not consider a skill sufficient if it is mentioned only in the skill list — there must be contextual evidence of usage (e.g., used in a project, job responsibility, or achievement).
+        - Treat RESUME as a single resume (not a list) and extract relevant details once for structuring sections and comparison against all job descriptions in JOB_DESCRIPTIONS.  
+        - **STRICTLY** base evaluations on RESUME and JOB_DESCRIPTIONS and extract title or role from JOB_DESCRIPTIONS and keep it same and short for every resume.  
+        - Calculate skill scores based on evidence in RESUME (e.g., years of experience, project involvement).  
         - For each job description, calculate the evaluation score by comparing the candidate’s skills and experience to the role’s requirements.  
-        - Ensure matchedSkills and missing are concise, relevant, and derived from comparing {text_content} to the job description.  
+        - Ensure matchedSkills and missing are concise, relevant, and derived from comparing RESUME to the job description.  
         - Suggestions (both in evaluations and resume suggestions) should be actionable and specific.  
         - The summary in evaluations should provide a clear, high-level assessment of fit for each role.  
         - Maintain the exact JSON structure as shown above, with all keys unchanged.  
-        - If certain fields (e.g., LinkedIn, achievements) are not found in {text_content}, leave them as empty strings or arrays as appropriate.  
-        - Use "Unknown" for candidateName if the name cannot be extracted from {text_content}.
-        - provide oversall summary of the candidate's resume with brief description explaining which {jd} is more suitable
+        - If certain fields (e.g., LinkedIn, achievements) are not found in RESUME, leave them as empty strings or arrays as appropriate.  
+        - Use "Unknown" for candidateName if the name cannot be extracted from RESUME.
+        - provide oversall summary of the candidate's resume with brief description explaining which job description in JOB_DESCRIPTIONS is more suitable
       """    
-    return resume_analysis_prompt
\ No newline at end of file
+    return resume_analysis_prompt
+
+def generate_structuring_prompt(text_content):
+    """
+    Generate the first-stage prompt that parses a resume into structured sections.
+
+    The result does not depend on any job description, so it can be cached by
+    resume hash and reused when the resume is scored against new roles.
+
+    Args:
+        text_content (str): The resume content.
+
+    Returns:
+        str: The generated prompt.
+    """
+
+    structuring_prompt = f"""
+{delimit_document("RESUME", text_content)}
+
+      Parse the resume in the <RESUME> block into structured sections and score its overall quality.
+
+      1. **Resume Parsing and Section Extraction**
+        - **Personal Information**: Name, Email, Phone, LinkedIn.
+        - **Summary/Objective**: A brief professional summary or objective.
+        - **Work Experience**: Company, Job Title, Start Date, End Date, Responsibilities, Achievements.
+        - **Projects**: Project Name, Description.
+        - **Skills**: Technical and soft skills, each with a score (0-10) based on years of experience, number of projects, and proficiency level indicated in RESUME.
+        - **Education**: College, Degree, Start Year, End Year, Percentage/CGPA.
+        - **Certifications**: List of certifications.
+
+      2. **Scoring Metrics for Resume**
+        - **overall_score (0-100):** skills relevance, grammar quality, vocabulary, and formatting clarity.
+        - **resume_styling_score (0-10):** vocabulary, grammar, and formatting.
+
+      3. **Processing Guidelines:**
+        - Keep responsibilities, achievements and project descriptions specific: they are later used as evidence of actual skill usage, so keep the technologies and tools they mention.
+        - If certain fields (e.g., LinkedIn, achievements) are not found in RESUME, leave them as empty strings or arrays as appropriate.
+        - Use "Unknown" for candidateName if the name cannot be extracted from RESUME.
+        - Return JSON only, with the keys: candidateName, personal_information, summary, work_experience, projects, skills, education, certifications, overall_score, resume_styling_score.
+      """
+    return structuring_prompt
+
+def generate_evaluation_prompt(structured_resume, jd, recommended_score):
+    """
+    Generate the second-stage prompt that scores a structured resume against job descriptions.
+
+    Args:
+        structured_resume (dict): Output of the structuring stage.
+        jd (str): The job description text.
+        recommended_score (int): Score at or above which a role is "recommended".
+
+    Returns:
+        str: The generated prompt.
+    """
+    resume_json = json.dumps(structured_resume, ensure_ascii=False, separators=(",", ":"))
+
+    evaluation_prompt = f"""
+{delimit_document("RESUME_JSON", resume_json)}
+
+{delimit_document("JOB_DESCRIPTIONS", jd)}
+
+      Evaluate the already parsed resume in the <RESUME_JSON> block against each job description in the <JOB_DESCRIPTIONS> block.
+
+      1. **Evaluation Criteria for Each Job Description**
+        - **STRICTLY** extract the exact title or role from JOB_DESCRIPTIONS and keep it the same and short; return it as "role".
+        - **score (0-100):** relevance and **actual usage** of the JD's required skills. A skill counts only if it is used in work_experience or projects in RESUME_JSON, not just listed in skills; also weigh years of experience and context of usage.
+        - **status:** "recommended" if score >= {recommended_score}, otherwise "not recommended".
+        - **matchedSkills:** top 3 matching skills required by the JD, comma separated.
+        - **missing:** up to 5 key JD skills missing or insufficiently demonstrated, comma separated.
+        - **suggest:** actionable recommendations to better align the resume with the JD.
+        - **summary:** clear explanation of fit. If status is "recommended" but alignment is weak, explicitly state "Resume is not aligned with the JD".
+
+      2. **overall_summary**
+        - Mandatory summary of the candidate's fit for all roles in JOB_DESCRIPTIONS, stating which role(s) suit the candidate best and why.
+
+      3. Return JSON only, with the keys: overall_summary, evaluations (a list of objects with role, score, status, matchedSkills, missing, suggest, summary).
+      """
+    return evaluation_prompt
@@ -24,6 +24,32 @@ if 'current_analysis' not in st.session_state:
     st.session_state.current_analysis = None
 if 'page' not in st.session_state:
     st.session_state.page = 'login'
+if 'token' not in st.session_state:
+    st.session_state.token = None
+if 'history' not in st.session_state:
+    st.session_state.history = {"items": [], "next_cursor": None, "loaded": False}
+if 'auth_message' not in st.session_state:
+    st.session_state.auth_message = None
+
+SESSION_EXPIRED = "Your session has expired. Please log in again."
+
+def clear_session():
+    """Forget the logged-in user and their data"""
+    st.session_state.authenticated = False
+    st.session_state.username = None
+    st.session_state.token = None
+    st.session_state.current_analysis = None
+    st.session_state.history = {"items": [], "next_cursor": None, "loaded": False}
+
+def expire_session():
+    """Log out after the backend rejected the token (e.g. it expired), so the login page is shown again"""
+    clear_session()
+    st.session_state.auth_message = SESSION_EXPIRED
+
+def return_to_login_if_expired():
+    """Show the login page if a request just expired the session"""
+    if not st.session_state.authenticated:
+        st.rerun()
 
 def login_user(username, password):
     try:
@@ -31,6 +57,7 @@ def login_user(username, password):
         if response.status_code == 200:
             st.session_state.authenticated = True
             st.session_state.username = username
+            st.session_state.token = response.json().get("access_token")
             st.session_state.page = 'analyze'
             return True, "Login successful!"
         else:
@@ -58,27 +85,77 @@ def register_user(username, password, confirm_password, email):
     except Exception as e:
         return False, f"Connection error: {str(e)}"
 
+def pdf_upload_files(resume_file, job_desc_file):
+    """Multipart files for an upload, sent from the uploaded file objects without copying them"""
+    resume_file.seek(0)
+    job_desc_file.seek(0)
+    return {
+        "resume_file": (resume_file.name, resume_file, "application/pdf"),
+        "job_description": (job_desc_file.name, job_desc_file, "application/pdf")
+    }
+
+def auth_headers():
+    """Authorization header for the logged-in user, so analyses are saved to their history"""
+    if st.session_state.token:
+        return {"Authorization": f"Bearer {st.session_state.token}"}
+    return {}
+
 def upload_resume(resume_file, job_desc_file, threshold):
     try:
-        files = {
-            "resume_file": (resume_file.name, resume_file.getvalue(), "application/pdf"),
-            "job_description": (job_desc_file.name, job_desc_file.getvalue(), "application/pdf")
-        }
-        data = {"recommended_store": threshold}
+        files = pdf_upload_files(resume_file, job_desc_file)
+        params = {"recommended_store": threshold}
         
         response = requests.post(
             f"{API_BASE_URL}/resume/upload_resume",
             files=files,
-            data=data
+            params=params,
+            headers=auth_headers()
         )
         
         if response.status_code == 200:
             return True, response.json()
+        elif response.status_code == 401:
+            expire_session()
+            return False, SESSION_EXPIRED
         else:
             return False, response.json().get("detail", "Upload failed")
     except Exception as e:
         return False, f"Upload error: {str(e)}"
 
+def upload_resume_stream(resume_file, job_desc_file, threshold, on_event):
+    """Upload via the streaming endpoint, calling on_event(event, data) for each SSE event"""
+    try:
+        files = pdf_upload_files(resume_file, job_desc_file)
+        params = {"recommended_store": threshold}
+
+        with requests.post(
+            f"{API_BASE_URL}/resume/upload_resume/stream",
+            files=files,
+            params=params,
+            headers=auth_headers(),
+            stream=True
+        ) as response:
+            if response.status_code == 401:
+                expire_session()
+                return False, SESSION_EXPIRED
+            if response.status_code != 200:
+                return False, response.json().get("detail", "Upload failed")
+
+            event = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    payload = json.loads(line[len("data:"):].strip())
+                    if event == "result":
+                        return True, payload
+                    if event == "error":
+                        return False, payload.get("detail", "Analysis failed")
+                    on_event(event, payload)
+        return False, "Stream ended without a result"
+    except Exception as e:
+        return False, f"Upload error: {str(e)}"
+
 def get_analysis_by_id(file_id):
     """Get analysis results by file ID"""
     try:
@@ -90,6 +167,55 @@ def get_analysis_by_id(file_id):
     except Exception as e:
         return False, f"Connection error: {str(e)}"
 
+def rethreshold_analysis(file_id, threshold):
+    """Re-apply a new threshold to a stored analysis without analyzing it again"""
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/resume/rethreshold/{file_id}",
+            params={"recommended_store": threshold},
+            headers=auth_headers()
+        )
+        if response.status_code == 200:
+            return True, response.json()
+        elif response.status_code == 401:
+            expire_session()
+            return False, SESSION_EXPIRED
+        else:
+            return False, response.json().get("detail", "Could not update the threshold")
+    except Exception as e:
+        return False, f"Connection error: {str(e)}"
+
+def get_history(cursor=None):
+    """Get a page of the logged-in user's analyses, newest first"""
+    try:
+        params = {"limit": 20}
+        if cursor:
+            params["cursor"] = cursor
+        response = requests.get(f"{API_BASE_URL}/resume/history", params=params, headers=auth_headers())
+        if response.status_code == 200:
+            return True, response.json()
+        elif response.status_code == 401:
+            expire_session()
+            return False, SESSION_EXPIRED
+        else:
+            return False, response.json().get("detail", "Could not load history")
+    except Exception as e:
+        return False, f"Connection error: {str(e)}"
+
+def display_prescreen_result(analysis):
+    """Display a pre-screened analysis, which has no LLM scores or role evaluations"""
+    prescreen = analysis.get('prescreen') or {}
+    st.markdown("### 🚫 Pre-screened")
+    st.warning(analysis.get('overall_summary', "Pre-screened without LLM analysis."))
+    st.metric("Skill Overlap with the JD", f"{prescreen.get('skill_overlap', 0)}%")
+    if prescreen.get('matchedSkills'):
+        st.markdown(f"**Matched skills:** {prescreen['matchedSkills']}")
+    if prescreen.get('missing'):
+        st.markdown(f"**Missing skills:** {prescreen['missing']}")
+    if prescreen.get('suggest'):
+        st.info(prescreen['suggest'])
+
+
 def display_analysis_results(analysis_data):
     """Display analysis results in an enhanced tile and tabular format"""
     if not analysis_data or 'analysis' not in analysis_data:
@@ -97,6 +223,10 @@ def display_analysis_results(analysis_data):
         return
     
     analysis = analysis_data['analysis']
+
+    if analysis.get('prescreened'):
+        display_prescreen_result(analysis)
+        return
     
     # Header with Analysis ID
     st.markdown("### 📊 Resume Analysis Report")
@@ -348,6 +478,8 @@ def show_auth_screen():
     """Show login/registration screen"""
     st.title("🔐 Resume Analyzer")
     st.write("Please login or register to continue")
+    if st.session_state.auth_message:
+        st.warning(st.session_state.auth_message)
     
     tab1, tab2 = st.tabs(["Login", "Register"])
 
@@ -363,6 +495,7 @@ def show_auth_screen():
                     with st.spinner("Logging in..."):
                         success, message = login_user(username, password)
                         if success:
+                            st.session_state.auth_message = None
                             st.success(message)
                             st.rerun()
                         else:
@@ -401,14 +534,12 @@ def show_main_app():
         st.write(f"👋 Welcome, **{st.session_state.username}**")
     with col3:
         if st.button("🚪 Logout", type="secondary"):
-            st.session_state.authenticated = False
-            st.session_state.username = None
-            st.session_state.current_analysis = None
+            clear_session()
             st.rerun()
     
     st.write('---')
 
-    tab1, tab2 = st.tabs(["📤 Upload Resume", "🔍 Search by ID"])
+    tab1, tab2, tab3 = st.tabs(["📤 Upload Resume", "🔍 Search by ID", "🕘 History"])
 
     with tab1:
         st.header("Upload Resume for Analysis")
@@ -427,17 +558,70 @@ def show_main_app():
         st.info(f"Roles scoring {threshold}+ will be marked as recommended")
 
         if st.button("🚀 Analyze Resume", type="primary", disabled=not (resume_file and job_desc_file)):
-            with st.spinner("Analyzing resume... Please wait"):
-                success, result = upload_resume(resume_file, job_desc_file, threshold)
+            stage_labels = {
+                "extract": "📄 Extracting text from PDFs...",
+                "extracted": "📄 Text extracted",
+                "cache_hit": "⚡ Found a previous analysis for these documents",
+                "prescreened": "🚫 Pre-screened: resume is far from the job requirements",
+                "coalesced": "⏳ Waiting for an identical analysis already in progress...",
+                "structure": "🗂️ Parsing resume sections...",
+                "prompt": "🧩 Preparing analysis prompt...",
+                "llm": "🤖 Analyzing with Gemini...",
+                "parse": "🔎 Parsing results...",
+                "store": "💾 Saving analysis...",
+            }
+            with st.status("Analyzing resume... Please wait", expanded=False) as progress:
+                received = {"chars": 0}
+                truncated = []
+
+                def on_event(event, payload):
+                    if event == "progress":
+                        progress.update(label=stage_labels.get(payload.get("stage"), "Analyzing resume..."))
+                        for name, info in payload.get("extraction", {}).items():
+                            if info.get("truncated"):
+                                truncated.append((name.replace("_", " "), info))
+                    elif event == "token":
+                        received["chars"] += len(payload.get("text", ""))
+                        progress.update(label=f"🤖 Analyzing with Gemini... ({received['chars']} characters received)")
+
+                success, result = upload_resume_stream(resume_file, job_desc_file, threshold, on_event)
+                progress.update(
+                    label="Analysis finished" if success else "Analysis failed",
+                    state="complete" if success else "error"
+                )
+            for name, info in truncated:
+                st.warning(
+                    f"Only the first {info['pages']} of {info['total_pages']} pages of the {name} were analyzed."
+                )
+            if success:
+                st.success("✅ Analysis completed!")
+                st.session_state.current_analysis = result
+                st.session_state.history["loaded"] = False
+                
+                # Show results immediately
+                st.subheader("📊 Analysis Results")
+                display_analysis_results(result)
+            else:
+                return_to_login_if_expired()
+                st.error(f"❌ Analysis failed: {result}")
+
+        # Moving the slider after an analysis only changes the statuses, which
+        # the backend recomputes from the stored scores
+        current = st.session_state.current_analysis
+        if (current and current.get("file_id") and not current.get("prescreened")
+                and current.get("recommended_store") != threshold):
+            if st.button(f"♻️ Apply threshold {threshold} to the last analysis", type="secondary"):
+                success, result = rethreshold_analysis(current["file_id"], threshold)
                 if success:
-                    st.success("✅ Analysis completed!")
-                    st.session_state.current_analysis = result
-                    
-                    # Show results immediately
+                    current["analysis"] = result["analysis"]
+                    current["recommended_store"] = result["recommended_store"]
+                    st.session_state.history["loaded"] = False
+                    st.success(f"✅ Statuses updated for threshold {threshold}, no new analysis needed")
                     st.subheader("📊 Analysis Results")
-                    display_analysis_results(result)
+                    display_analysis_results(current)
                 else:
-                    st.error(f"❌ Analysis failed: {result}")
+                    return_to_login_if_expired()
+                    st.error(f"❌ {result}")
 
     with tab2:
         st.header("Search Previous Analysis")
@@ -457,6 +641,47 @@ def show_main_app():
                 else:
                     st.error(f"❌ Fetch failed: {result}")
 
+    with tab3:
+        st.header("Your Previous Analyses")
+        history = st.session_state.history
+
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            refresh = st.button("🔄 Refresh")
+        if refresh or not history["loaded"]:
+            success, result = get_history()
+            if success:
+                history.update(items=result["items"], next_cursor=result["next_cursor"], loaded=True)
+            else:
+                return_to_login_if_expired()
+                st.error(f"❌ {result}")
+
+        if history["items"]:
+            st.dataframe(
+                pd.DataFrame([{
+                    "Date": item["created_at"][:19].replace("T", " "),
+                    "File": item.get("filename"),
+                    "Candidate": (item.get("summary") or {}).get("candidateName"),
+                    "Overall Score": (item.get("summary") or {}).get("overall_score"),
+                    "Recommended Roles": (item.get("summary") or {}).get("recommended_count"),
+                    "Analysis ID": item["file_id"],
+                } for item in history["items"]]),
+                use_container_width=True,
+                hide_index=True
+            )
+            if history["next_cursor"] and st.button("⬇️ Load more"):
+                success, result = get_history(history["next_cursor"])
+                if success:
+                    history["items"].extend(result["items"])
+                    history["next_cursor"] = result["next_cursor"]
+                    st.rerun()
+                else:
+                    return_to_login_if_expired()
+                    st.error(f"❌ {result}")
+            st.caption("Open an analysis by pasting its ID in the Search by ID tab.")
+        elif history["loaded"]:
+            st.info("No analyses yet.")
+
 
 def main():
     """Main application function"""